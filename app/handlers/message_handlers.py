@@ -1,30 +1,753 @@
+import asyncio
+import base64
+import hashlib
+import html
 import logging
 import re
-from typing import Optional, List
-from telegram import Update
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from types import MappingProxyType
+from dataclasses import asdict
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Awaitable, Callable, Dict, Optional, List, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Message, Update
 from telegram.ext import ContextTypes
-from telegram.error import BadRequest
+from telegram.error import BadRequest, RetryAfter, TelegramError
 from app.services.llm_service import LLMService
 from app.services.conversation_memory import conversation_memory
 from app.services.plan_storage import plan_storage
 from app.services.follow_up_questions import follow_up_service
 from app.services.inline_keyboards import inline_keyboard_service
 from app.services.hotel_ui_service import HotelUIService
-from app.services.hotel_state_machine import hotel_state_machine
+from app.services.hotel_state_machine import HotelStateMachine, hotel_state_machine
 from app.services.hotel_ui_v2 import hotel_ui_v2
+from app.services.hotel_agent import hotel_agent
+from app.models.hotel_slots import HotelSlots
 
 logger = logging.getLogger(__name__)
 
+# Shared reply literals, kept at module level so every handler reuses one object
+_PM_MARKDOWN = "Markdown"
+_PM_HTML = "HTML"
+_NO_HELP_TEXT = "🤔 我不太确定您想要什么帮助。让我为您提供一些选项："
+_NO_HELP_FALLBACK_TEXT = "🤔 我不太确定您想要什么帮助。请告诉我您需要什么，我会尽力协助您！"
+_FOLLOW_UP_PROMPT_TEXT = "💡 *你更倾向哪个方案？*"
+_MORE_HELP_TEXT = "💡 *我还可以帮您：*"
+_HOTEL_UI_ERROR_TEXT = "抱歉，显示酒店推荐界面时出现了错误。"
+_SELECTION_ERROR_TEXT = "抱歉，处理您的选择时出现了错误。请重试。"
+_BUDGET_DISPLAY_ERROR_TEXT = "抱歉，显示预算选择时出现了问题。请重试。"
+_HOTEL_UI_SELECTION_ERROR_TEXT = "抱歉，处理您的选择时出现了错误。"
+_HOTEL_UI_INPUT_ERROR_TEXT = "抱歉，处理您的输入时出现了错误。"
+_NO_HOTEL_RECOMMENDATIONS_TEXT = "抱歉，没有找到合适的酒店推荐。请尝试调整您的搜索条件。"
+_HOTEL_RECOMMENDATIONS_ERROR_TEXT = "抱歉，生成酒店推荐时出现了错误。请稍后重试。"
+_CALLBACK_ERROR_TEXT = "Sorry, something went wrong processing your selection."
+
+# Telegram's limit on the text of a single message
+_MAX_MESSAGE_LENGTH = 4096
+
+# Streaming text replies: placeholder shown before the first chunk, and edit throttling
+_STREAM_PLACEHOLDER_TEXT = "✍️ ..."
+_STREAM_EDIT_MIN_CHARS = 200
+_STREAM_EDIT_INTERVAL = 1.0  # seconds
+
+# Text messages from one user in a chat arriving within this window are answered together
+_TEXT_DEBOUNCE_SECONDS = 0.8
+
+# Hotel state machine screens remembered per (chat_id, message_id) to skip no-op edits
+_LAST_RENDER_MAX_ENTRIES = 256
+
+# Instagram button markups remembered per (destination, response digest)
+_INSTAGRAM_MARKUP_MAX_ENTRIES = 256
+
+# Custom button prompts, formatted with the user's name
+_QUICK_FLIGHT_PROMPT_TMPL = (
+    "✈️ 好的，{user_name}！我来帮您快速查询航班。\n\n"
+    "请告诉我：\n"
+    "1. 出发城市和目的地\n"
+    "2. 出发日期\n"
+    "3. 是否往返（如果是，请提供返程日期）\n\n"
+    "例如：'上海到纽约，10月1号出发，10月5号返回'"
+)
+_BOOK_HOTEL_PROMPT_TMPL = (
+    "🏨 好的，{user_name}！我来帮您预订酒店。\n\n"
+    "请告诉我：\n"
+    "1. 目的地城市\n"
+    "2. 入住和退房日期\n"
+    "3. 房间数量和客人数量\n"
+    "4. 预算范围（可选）\n\n"
+    "例如：'纽约，10月1号到10月5号，2个房间，4个客人'"
+)
+_WEATHER_PROMPT_TMPL = (
+    "🌤️ 好的，{user_name}！我来帮您查看天气信息。\n\n"
+    "请告诉我：\n"
+    "1. 您想查询哪个城市的天气？\n"
+    "2. 需要查看哪几天的天气？（可选）\n\n"
+    "例如：'纽约的天气' 或 '东京10月1号到10月5号的天气'"
+)
+_SHARE_LOCATION_PROMPT_TMPL = (
+    "📍 好的，{user_name}！\n\n"
+    "请分享您的位置，这样我可以：\n"
+    "• 为您推荐附近的景点和餐厅\n"
+    "• 提供当地的交通信息\n"
+    "• 查看您当前位置的天气\n"
+    "• 规划从您当前位置出发的路线\n\n"
+    "请点击Telegram的'分享位置'按钮发送您的位置。"
+)
+
+# Static command texts
+_HELP_MESSAGE = (
+    "🤖 *TravelBot Commands & Features:*\n\n"
+    "*🗺️ Travel Planning:*\n"
+    "/plan <details> - Generate structured travel plan\n"
+    "/plans - List all your saved plans\n"
+    "/viewplan <ID> - View detailed plan\n"
+    "/deleteplan <ID> - Delete a plan\n\n"
+    "*💬 Conversation:*\n"
+    "/start - Welcome message\n"
+    "/help - Show this help message\n"
+    "/history - View recent conversation\n"
+    "/clear - Clear conversation history\n\n"
+    "*🎯 I can help with:*\n"
+    "📝 Text messages - Share your travel ideas\n"
+    "🔗 Links - Send me travel websites or articles\n"
+    "📸 Photos - AI-powered image analysis (menus, destinations)\n"
+    "👥 Group chats - Collaborative planning\n"
+    "📋 Structured plans - Detailed JSON-based itineraries\n\n"
+    "*Example:* `/plan 5 days in Tokyo, budget travel, love food and culture`\n\n"
+    "I use AI with conversation memory and structured planning!"
+)
+_PLAN_USAGE_TEXT = (
+    "🗺️ To generate a travel plan, please provide some details!\n\n"
+    "Examples:\n"
+    "• `/plan 5 days in Tokyo, budget travel, love food and culture`\n"
+    "• `/plan weekend trip to Paris for couple, moderate budget`\n"
+    "• `/plan family vacation to Thailand, 1 week, beaches and temples`\n\n"
+    "Or just tell me about your travel ideas and I'll create a plan based on our conversation!"
+)
+_VIEWPLAN_USAGE_TEXT = (
+    "Please specify a plan ID!\n\n"
+    "Usage: `/viewplan <plan_id>`\n"
+    "Use `/plans` to see all your plan IDs."
+)
+_DELETEPLAN_USAGE_TEXT = (
+    "Please specify a plan ID to delete!\n\n"
+    "Usage: `/deleteplan <plan_id>`\n"
+    "Use `/plans` to see all your plan IDs."
+)
+
+# Hotel UI step prompts, pre-rendered as HTML (unambiguous to parse, no entity errors)
+_CHECKIN_PROMPT_HTML = "📅 <b>请选择入住日期</b>\n\n选择未来14天内的日期："
+_NIGHTS_PROMPT_HTML = "🛏 <b>请选择住宿晚数</b>\n\n选择您计划住几晚："
+_BUDGET_PROMPT_HTML = "💰 <b>请选择每晚预算</b>\n\n选择您的预算范围："
+_PARTY_PROMPT_HTML = "\n\n👪 <b>调整同行人数和房间数</b>\n\n使用下方按钮调整："
+
+# Keywords used to classify LLM responses and user queries in handle_text
+_HOTEL_RESPONSE_KEYWORDS = (
+    "酒店", "hotel", "住宿", "宾馆", "旅馆", "resort", "boutique",
+    "accommodation", "lodging", "inn", "suite", "lodge",
+)
+# Single case-insensitive scan for hotel keywords in both messages and responses;
+# phrases such as "推荐酒店" or "订酒店" are already covered by "酒店"
+_HOTEL_KEYWORD_RE = re.compile("|".join(map(re.escape, _HOTEL_RESPONSE_KEYWORDS)), re.IGNORECASE)
+_TRAVEL_QUERY_KEYWORDS = ("旅行", "旅游", "计划", "推荐", "帮助", "travel", "trip", "plan")
+_TRAVEL_QUERY_RE = re.compile("|".join(map(re.escape, _TRAVEL_QUERY_KEYWORDS)), re.IGNORECASE)
+
+# Cities recognised when pre-filling the hotel UI, in priority order
+_UI_CITIES = (
+    "东京", "Tokyo", "上海", "Shanghai", "北京", "Beijing", "大阪", "Osaka",
+    "京都", "Kyoto", "箱根", "Hakone", "纽约", "New York", "巴黎", "Paris",
+    "伦敦", "London", "新加坡", "Singapore", "香港", "Hong Kong", "台北", "Taipei",
+)
+_UI_CITY_PRIORITY = {city: index for index, city in enumerate(_UI_CITIES)}
+
+# Custom buttons offered alongside general travel replies
+_TRAVEL_CUSTOM_BUTTONS = ("quick_flight", "book_hotel", "weather")
+
+# Month abbreviations for plan listings, equivalent to strftime("%b") in the C locale
+_MONTH_ABBR = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# (field, default) pairs read from plan sections by _format_detailed_plan
+_ACCOMMODATION_FIELDS = (("name", "Hotel"), ("type", "hotel"), ("location", "TBD"), ("price_range", "TBD"))
+_DAY_FIELDS = (("day", "?"), ("theme", "Activities"), ("activities", []), ("estimated_cost", "TBD"))
+_ACTIVITY_FIELDS = (("name", "Activity"), ("cost", "TBD"))
+
+# Callback actions answered by _handle_question_answer_callback
+_QUESTION_ANSWER_ACTIONS = frozenset({
+    "dest", "dur", "budg", "grp", "int", "date", "flight", "airline", "airport", "time",
+})
+
+# Hotel agent slot defaults, merged under the UI slots for each recommendation request
+_DEFAULT_HOTEL_SLOTS = hotel_agent._initialize_slots()
+
+# Callbacks that run an LLM request; their acknowledgement shows a processing toast
+_SLOW_CALLBACK_ACTIONS = frozenset({"plan", "flight_choice", "generate_recommendation"})
+_SLOW_CALLBACK_DATA = frozenset({"hotel_ui:done"})
+_PROCESSING_TOAST_TEXT = "处理中…"
+
+# Hotel UI free-text inputs, mapped to the label used when confirming them
+_HOTEL_UI_INPUT_LABELS = {"city": "目的地", "budget": "预算"}
+
+# Callback actions handled by the hotel state machine UI
+_NEW_HOTEL_UI_ACTIONS = frozenset({
+    "set_city", "set_budget", "set_location", "set_tags", "set_checkin",
+    "set_checkout", "set_party", "set_extras", "generate_recommendation",
+    "toggle_tag", "set_adults", "set_children", "set_rooms", "toggle_facility",
+    "set_view", "set_open_after", "set_brand", "confirm_children_yes",
+    "confirm_children_no", "add_child_age", "custom_city", "custom_budget",
+    "custom_location", "confirm_tags", "confirm_party", "confirm_extras",
+    "confirm_facilities", "confirm_view", "confirm_brand", "confirm_open_after",
+    "back_main", "back_extras", "change_hotels", "compare_hotels",
+})
+
+# Single-line Markdown entities produced by the plan formatters; underscores inside
+# words (snake_case, plan IDs) are left alone
+_MD_ENTITY_RE = re.compile(r"`([^`\n]+)`|\*([^*\n]+)\*|(?<!\w)_([^_\n]+)_(?!\w)")
+
+_URL_RE = re.compile(r"https?://[A-Za-z0-9$\-_@.&+!*(),%/?=#:;~]+")
+
+# Group-wide mentions that address the bot too (substring match, like "@all" in text);
+# combined with the bot's own @username once it is known
+_GROUP_MENTION_PATTERN = r"@(?:all|everyone)"
+_GROUP_MENTION_RE = re.compile(_GROUP_MENTION_PATTERN, re.IGNORECASE)
+
+# Read-only map of destination keywords to normalized names
+_DESTINATION_MAP = MappingProxyType({
+    "东京": "tokyo",
+    "tokyo": "tokyo",
+    "纽约": "new_york",
+    "new york": "new_york",
+    "巴黎": "paris",
+    "paris": "paris",
+    "伦敦": "london",
+    "london": "london",
+    "大阪": "osaka",
+    "osaka": "osaka",
+    "京都": "kyoto",
+    "kyoto": "kyoto",
+    "名古屋": "nagoya",
+    "nagoya": "nagoya",
+    "首尔": "seoul",
+    "seoul": "seoul",
+    "新加坡": "singapore",
+    "singapore": "singapore",
+    "吉隆坡": "kuala_lumpur",
+    "kuala lumpur": "kuala_lumpur",
+    "曼谷": "bangkok",
+    "bangkok": "bangkok",
+    "台北": "taipei",
+    "taipei": "taipei",
+    "香港": "hong_kong",
+    "hong kong": "hong_kong",
+    "上海": "shanghai",
+    "shanghai": "shanghai",
+    "北京": "beijing",
+    "beijing": "beijing",
+    "深圳": "shenzhen",
+    "shenzhen": "shenzhen",
+    "广州": "guangzhou",
+    "guangzhou": "guangzhou",
+    "成都": "chengdu",
+    "chengdu": "chengdu",
+    "杭州": "hangzhou",
+    "hangzhou": "hangzhou",
+    "南京": "nanjing",
+    "nanjing": "nanjing",
+    "武汉": "wuhan",
+    "wuhan": "wuhan",
+    "西安": "xian",
+    "xian": "xian",
+    "重庆": "chongqing",
+    "chongqing": "chongqing",
+    "天津": "tianjin",
+    "tianjin": "tianjin",
+    "青岛": "qingdao",
+    "qingdao": "qingdao",
+    "大连": "dalian",
+    "dalian": "dalian",
+    "厦门": "xiamen",
+    "xiamen": "xiamen",
+    "苏州": "suzhou",
+    "suzhou": "suzhou",
+    "无锡": "wuxi",
+    "wuxi": "wuxi",
+    "宁波": "ningbo",
+    "ningbo": "ningbo",
+    "温州": "wenzhou",
+    "wenzhou": "wenzhou",
+    "福州": "fuzhou",
+    "fuzhou": "fuzhou",
+    "济南": "jinan",
+    "jinan": "jinan",
+    "石家庄": "shijiazhuang",
+    "shijiazhuang": "shijiazhuang",
+    "太原": "taiyuan",
+    "taiyuan": "taiyuan",
+    "呼和浩特": "hohhot",
+    "hohhot": "hohhot",
+    "沈阳": "shenyang",
+    "shenyang": "shenyang",
+    "长春": "changchun",
+    "changchun": "changchun",
+    "哈尔滨": "harbin",
+    "harbin": "harbin",
+    "合肥": "hefei",
+    "hefei": "hefei",
+    "南昌": "nanchang",
+    "nanchang": "nanchang",
+    "郑州": "zhengzhou",
+    "zhengzhou": "zhengzhou",
+    "长沙": "changsha",
+    "changsha": "changsha",
+    "南宁": "nanning",
+    "nanning": "nanning",
+    "海口": "haikou",
+    "haikou": "haikou",
+    "三亚": "sanya",
+    "sanya": "sanya",
+    "贵阳": "guiyang",
+    "guiyang": "guiyang",
+    "昆明": "kunming",
+    "kunming": "kunming",
+    "拉萨": "lhasa",
+    "lhasa": "lhasa",
+    "兰州": "lanzhou",
+    "lanzhou": "lanzhou",
+    "西宁": "xining",
+    "xining": "xining",
+    "银川": "yinchuan",
+    "yinchuan": "yinchuan",
+    "乌鲁木齐": "urumqi",
+    "urumqi": "urumqi",
+    "富国岛": "phu_quoc",
+    "phu quoc": "phu_quoc",
+    "phuquoc": "phu_quoc",
+    "巴厘岛": "bali",
+    "bali": "bali",
+    "巴厘": "bali",
+    # 东南亚
+    "普吉岛": "phuket",
+    "phuket": "phuket",
+    "苏梅岛": "koh_samui",
+    "koh samui": "koh_samui",
+    "清迈": "chiang_mai",
+    "chiang mai": "chiang_mai",
+    "清莱": "chiang_rai",
+    "chiang rai": "chiang_rai",
+    "甲米": "krabi",
+    "krabi": "krabi",
+    "华欣": "hua_hin",
+    "hua hin": "hua_hin",
+    "芭提雅": "pattaya",
+    "pattaya": "pattaya",
+    "马尼拉": "manila",
+    "manila": "manila",
+    "宿务": "cebu",
+    "cebu": "cebu",
+    "长滩岛": "boracay",
+    "boracay": "boracay",
+    "河内": "hanoi",
+    "hanoi": "hanoi",
+    "胡志明市": "ho_chi_minh",
+    "ho chi minh": "ho_chi_minh",
+    "岘港": "da_nang",
+    "da nang": "da_nang",
+    "会安": "hoi_an",
+    "hoi an": "hoi_an",
+    "芽庄": "nha_trang",
+    "nha trang": "nha_trang",
+    "大叻": "da_lat",
+    "da lat": "da_lat",
+    "雅加达": "jakarta",
+    "jakarta": "jakarta",
+    "日惹": "yogyakarta",
+    "yogyakarta": "yogyakarta",
+    "泗水": "surabaya",
+    "surabaya": "surabaya",
+    "棉兰": "medan",
+    "medan": "medan",
+    "槟城": "penang",
+    "penang": "penang",
+    "马六甲": "malacca",
+    "malacca": "malacca",
+    "兰卡威": "langkawi",
+    "langkawi": "langkawi",
+    "沙巴": "sabah",
+    "sabah": "sabah",
+    "沙捞越": "sarawak",
+    "sarawak": "sarawak",
+    # 东亚
+    "福冈": "fukuoka",
+    "fukuoka": "fukuoka",
+    "广岛": "hiroshima",
+    "hiroshima": "hiroshima",
+    "札幌": "sapporo",
+    "sapporo": "sapporo",
+    "仙台": "sendai",
+    "sendai": "sendai",
+    "横滨": "yokohama",
+    "yokohama": "yokohama",
+    "神户": "kobe",
+    "kobe": "kobe",
+    "奈良": "nara",
+    "nara": "nara",
+    "冲绳": "okinawa",
+    "okinawa": "okinawa",
+    "釜山": "busan",
+    "busan": "busan",
+    "济州岛": "jeju",
+    "jeju": "jeju",
+    "大邱": "daegu",
+    "daegu": "daegu",
+    "光州": "gwangju",
+    "gwangju": "gwangju",
+    "大田": "daejeon",
+    "daejeon": "daejeon",
+    "仁川": "incheon",
+    "incheon": "incheon",
+    # 欧洲
+    "罗马": "rome",
+    "rome": "rome",
+    "米兰": "milan",
+    "milan": "milan",
+    "威尼斯": "venice",
+    "venice": "venice",
+    "佛罗伦萨": "florence",
+    "florence": "florence",
+    "那不勒斯": "naples",
+    "naples": "naples",
+    "巴塞罗那": "barcelona",
+    "barcelona": "barcelona",
+    "马德里": "madrid",
+    "madrid": "madrid",
+    "塞维利亚": "seville",
+    "seville": "seville",
+    "柏林": "berlin",
+    "berlin": "berlin",
+    "慕尼黑": "munich",
+    "munich": "munich",
+    "汉堡": "hamburg",
+    "hamburg": "hamburg",
+    "阿姆斯特丹": "amsterdam",
+    "amsterdam": "amsterdam",
+    "鹿特丹": "rotterdam",
+    "rotterdam": "rotterdam",
+    "布鲁塞尔": "brussels",
+    "brussels": "brussels",
+    "维也纳": "vienna",
+    "vienna": "vienna",
+    "萨尔茨堡": "salzburg",
+    "salzburg": "salzburg",
+    "苏黎世": "zurich",
+    "zurich": "zurich",
+    "日内瓦": "geneva",
+    "geneva": "geneva",
+    "布拉格": "prague",
+    "prague": "prague",
+    "布达佩斯": "budapest",
+    "budapest": "budapest",
+    "华沙": "warsaw",
+    "warsaw": "warsaw",
+    "斯德哥尔摩": "stockholm",
+    "stockholm": "stockholm",
+    "哥本哈根": "copenhagen",
+    "copenhagen": "copenhagen",
+    "奥斯陆": "oslo",
+    "oslo": "oslo",
+    "赫尔辛基": "helsinki",
+    "helsinki": "helsinki",
+    "莫斯科": "moscow",
+    "moscow": "moscow",
+    "圣彼得堡": "st_petersburg",
+    "st petersburg": "st_petersburg",
+    # 北美
+    "洛杉矶": "los_angeles",
+    "los angeles": "los_angeles",
+    "旧金山": "san_francisco",
+    "san francisco": "san_francisco",
+    "拉斯维加斯": "las_vegas",
+    "las vegas": "las_vegas",
+    "迈阿密": "miami",
+    "miami": "miami",
+    "芝加哥": "chicago",
+    "chicago": "chicago",
+    "波士顿": "boston",
+    "boston": "boston",
+    "华盛顿": "washington_dc",
+    "washington dc": "washington_dc",
+    "西雅图": "seattle",
+    "seattle": "seattle",
+    "多伦多": "toronto",
+    "toronto": "toronto",
+    "温哥华": "vancouver",
+    "vancouver": "vancouver",
+    "蒙特利尔": "montreal",
+    "montreal": "montreal",
+    # 大洋洲
+    "悉尼": "sydney",
+    "sydney": "sydney",
+    "墨尔本": "melbourne",
+    "melbourne": "melbourne",
+    "布里斯班": "brisbane",
+    "brisbane": "brisbane",
+    "珀斯": "perth",
+    "perth": "perth",
+    "阿德莱德": "adelaide",
+    "adelaide": "adelaide",
+    "奥克兰": "auckland",
+    "auckland": "auckland",
+    "惠灵顿": "wellington",
+    "wellington": "wellington",
+    "基督城": "christchurch",
+    "christchurch": "christchurch",
+    # 中东
+    "迪拜": "dubai",
+    "dubai": "dubai",
+    "阿布扎比": "abu_dhabi",
+    "abu dhabi": "abu_dhabi",
+    "多哈": "doha",
+    "doha": "doha",
+    "科威特": "kuwait",
+    "kuwait": "kuwait",
+    "利雅得": "riyadh",
+    "riyadh": "riyadh",
+    "吉达": "jeddah",
+    "jeddah": "jeddah",
+    "伊斯坦布尔": "istanbul",
+    "istanbul": "istanbul",
+    "安卡拉": "ankara",
+    "ankara": "ankara",
+    # 非洲
+    "开罗": "cairo",
+    "cairo": "cairo",
+    "开普敦": "cape_town",
+    "cape town": "cape_town",
+    "约翰内斯堡": "johannesburg",
+    "johannesburg": "johannesburg",
+    "内罗毕": "nairobi",
+    "nairobi": "nairobi",
+    "拉各斯": "lagos",
+    "lagos": "lagos",
+    # 南美
+    "圣保罗": "sao_paulo",
+    "sao paulo": "sao_paulo",
+    "里约热内卢": "rio_de_janeiro",
+    "rio de janeiro": "rio_de_janeiro",
+    "布宜诺斯艾利斯": "buenos_aires",
+    "buenos aires": "buenos_aires",
+    "利马": "lima",
+    "lima": "lima",
+    "圣地亚哥": "santiago",
+    "santiago": "santiago",
+    "波哥大": "bogota",
+    "bogota": "bogota",
+    "加拉加斯": "caracas",
+    "caracas": "caracas",
+})
+
+_DESTINATION_PRIORITY = {keyword: index for index, keyword in enumerate(_DESTINATION_MAP)}
+
+# Single scan for destination keywords (case-insensitive, keys are lowercase) and
+# UI cities (exact case) at once. Each position yields (destination, city, lone city).
+# Destination keywords are tried longest first so the longest keyword starting at a
+# position wins, and hits inside an earlier, longer hit are dropped; among the
+# remaining hits the earliest-listed one wins, keeping each table's priority order
+_DESTINATION_ALTERNATION = "|".join(map(re.escape, sorted(_DESTINATION_MAP, key=len, reverse=True)))
+_UI_CITY_ALTERNATION = "|".join(map(re.escape, _UI_CITIES))
+_LOCATION_SCANNER = re.compile(
+    f"(?:(?=(?i:({_DESTINATION_ALTERNATION})))(?=({_UI_CITY_ALTERNATION}))?"
+    f"|(?=({_UI_CITY_ALTERNATION})))"
+)
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-flight
+_BACKGROUND_TASKS = set()
+
+# Bounds concurrent Telegram file downloads so upload bursts can't exhaust memory
+_DOWNLOAD_SEM = asyncio.Semaphore(8)
+
+
+def _get_hotel_slots(user_data: dict) -> HotelSlots:
+    """Return the user's hotel UI slots, creating the defaults on first use"""
+    slots = user_data.get("hotel_slots")
+    if slots is None:
+        slots = user_data["hotel_slots"] = HotelSlots()
+    return slots
+
+
+def _edit_reply(message: Message) -> Callable[..., Awaitable[Any]]:
+    """Return a reply_text-compatible callable that edits message in place"""
+    async def reply(text: str, **kwargs) -> Message:
+        try:
+            return await message.edit_text(text, **kwargs)
+        except BadRequest as e:
+            error = str(e).lower()
+            # The final text can match the last streamed edit exactly
+            if "not modified" in error:
+                return message
+            # LLM output can contain Markdown Telegram rejects; show it unformatted
+            if "can't parse entities" in error and kwargs.pop("parse_mode", None):
+                return await reply(text, **kwargs)
+            raise
+    return reply
+
+
+@lru_cache(maxsize=1024)
+def _is_hotel_related_text(message: str) -> bool:
+    """Keyword check behind _is_hotel_related_message (cached, short phrases repeat)"""
+    return _HOTEL_KEYWORD_RE.search(message) is not None
+
+
+@lru_cache(maxsize=128)
+def _hotel_caption(destination: str) -> str:
+    """Markdown photo caption for a destination's hotel picks (destinations repeat)"""
+    return f"🏨 *{destination}的精选酒店* - 为您推荐优质住宿！"
+
+
+@lru_cache(maxsize=1024)
+def _extract_location(message: str) -> Tuple[Optional[str], Optional[str]]:
+    """(first _UI_CITIES entry, normalized destination) found in message in one scan"""
+    destinations = []
+    cities = []
+    covered_until = 0
+    for match in _LOCATION_SCANNER.finditer(message):
+        destination, city, lone_city = match.groups()
+        # (?i) also matches case-folded forms such as "ſ" for "s" whose lower()
+        # is not a key; message.lower() never contained those, so skip them
+        if destination and destination.lower() in _DESTINATION_MAP:
+            end = match.start() + len(destination)
+            if end > covered_until:
+                destinations.append(destination.lower())
+                covered_until = end
+        if city or lone_city:
+            cities.append(city or lone_city)
+    city = min(cities, key=_UI_CITY_PRIORITY.__getitem__) if cities else None
+    if not destinations:
+        return city, None
+    return city, _DESTINATION_MAP[min(destinations, key=_DESTINATION_PRIORITY.__getitem__)]
+
+
+def _spawn_background(coro) -> asyncio.Task:
+    """Run a best-effort coroutine without awaiting it, keeping a reference until done"""
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_on_background_task_done)
+    return task
+
+
+def _on_background_task_done(task: asyncio.Task) -> None:
+    _BACKGROUND_TASKS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background task failed: {task.exception()}")
+
+
+def _markdown_to_html(text: str) -> str:
+    """Convert the bot's Markdown markers (*bold*, _italic_, `code`) to Telegram HTML"""
+    return _MD_ENTITY_RE.sub(_md_entity_to_html, html.escape(text, quote=False))
+
+
+def _md_entity_to_html(match: re.Match) -> str:
+    code, bold, italic = match.groups()
+    if code is not None:
+        return f"<code>{code}</code>"
+    if bold is not None:
+        return f"<b>{bold}</b>"
+    return f"<i>{italic}</i>"
+
+
+def _section_row_reader(items, fields: Tuple[Tuple[str, Any], ...]):
+    """Build a reader returning the given (field, default) values for plan section rows
+    
+    The dict-or-model representation is decided once from the first item. Model rows
+    are read with a single attrgetter call and empty values fall back to the default.
+    """
+    keys = tuple(key for key, _ in fields)
+    defaults = tuple(default for _, default in fields)
+    
+    if isinstance(items[0], dict):
+        return lambda row: tuple(row.get(key, default) for key, default in fields)
+    
+    getter = attrgetter(*keys)
+    if len(keys) == 1:
+        return lambda row: (getter(row) or defaults[0],)
+    return lambda row: tuple(value or default for value, default in zip(getter(row), defaults))
+
 
 class MessageHandlers:
+    __slots__ = (
+        "llm_service",
+        "hotel_ui_service",
+        "_intent_dispatch",
+        "_callback_dispatch",
+        "_answer_callback_dispatch",
+        "_hotel_ui_dispatch",
+        "_pending_text",
+        "_last_render",
+        "_instagram_markups",
+        "_bot_username",
+        "_bot_mention_re",
+    )
+
     def __init__(self):
         self.llm_service = LLMService()
         self.hotel_ui_service = HotelUIService()
+        # Response senders keyed by the intent returned from _classify_response_intent
+        self._intent_dispatch = {
+            "hotel": self._send_influencer_hotel_response,
+            "travel": self._send_travel_intent_response,
+            None: self._send_default_response,
+        }
+        # Callback handlers taking (query, context, user_name, chat_id), keyed by action
+        self._callback_dispatch = {
+            "plan": self._handle_generate_plan_callback,
+            "more": self._handle_more_info_callback,
+            "quick_flight": self._handle_quick_flight_callback,
+            "book_hotel": self._handle_book_hotel_callback,
+            "weather": self._handle_weather_callback,
+            "share_loc": self._handle_share_location_callback,
+            "hotel_ui": self._handle_hotel_ui_callback,
+        }
+        self._callback_dispatch.update(
+            dict.fromkeys(_NEW_HOTEL_UI_ACTIONS, self._handle_new_hotel_ui_callback)
+        )
+        # Callback handlers that also need the parsed action, value and user choice
+        self._answer_callback_dispatch = {
+            "flight_choice": self._handle_flight_choice_callback,
+        }
+        self._answer_callback_dispatch.update(
+            dict.fromkeys(_QUESTION_ANSWER_ACTIONS, self._handle_question_answer_callback)
+        )
+        # Hotel UI menu actions taking (query, context, slots, user_name, chat_id);
+        # any other hotel_ui callback is treated as a slot update
+        self._hotel_ui_dispatch = {
+            "hotel_ui:back_main": self._hotel_ui_back_main,
+            "hotel_ui:ask_city": self._hotel_ui_ask_city,
+            "hotel_ui:ask_checkin": self._hotel_ui_ask_checkin,
+            "hotel_ui:ask_nights": self._hotel_ui_ask_nights,
+            "hotel_ui:ask_budget": self._hotel_ui_ask_budget,
+            "hotel_ui:ask_party": self._hotel_ui_ask_party,
+            "hotel_ui:custom_budget": self._hotel_ui_custom_budget,
+            "hotel_ui:done": self._hotel_ui_done,
+        }
+        # Per-(chat_id, user_id) (debounce task, buffered (text, urls)) for bursts of text messages
+        self._pending_text: Dict[Tuple[int, Optional[int]], Tuple[asyncio.Task, List[Tuple[str, List[str]]]]] = {}
+        # (text hash, keyboard hash) last shown on each hotel state machine message
+        self._last_render: "OrderedDict[Tuple[int, int], Tuple[int, int]]" = OrderedDict()
+        # Instagram button markup built for each recently answered hotel response
+        self._instagram_markups: "OrderedDict[Tuple[str, bytes], InlineKeyboardMarkup]" = OrderedDict()
+        # Bot username and the combined @mention pattern built for it
+        self._bot_username: Optional[str] = None
+        self._bot_mention_re: Optional[re.Pattern] = None
+
+    def _extract_update_context(self, update: Update) -> Tuple[int, str, str]:
+        """Resolve (chat_id, chat_type, user_name) from an update in one pass"""
+        chat = update.effective_chat
+        user = update.effective_user
+        return chat.id, chat.type, (user.first_name if user else None) or "User"
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command with LLM-generated welcome"""
-        user_name = update.effective_user.first_name or "User"
-        chat_type = update.effective_chat.type
+        _, chat_type, user_name = self._extract_update_context(update)
         
         try:
             welcome_message = await self.llm_service.generate_welcome_message(user_name, chat_type)
@@ -39,38 +762,16 @@ class MessageHandlers:
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command"""
-        help_message = (
-            "🤖 *TravelBot Commands & Features:*\n\n"
-            "*🗺️ Travel Planning:*\n"
-            "/plan <details> - Generate structured travel plan\n"
-            "/plans - List all your saved plans\n"
-            "/viewplan <ID> - View detailed plan\n"
-            "/deleteplan <ID> - Delete a plan\n\n"
-            "*💬 Conversation:*\n"
-            "/start - Welcome message\n"
-            "/help - Show this help message\n"
-            "/history - View recent conversation\n"
-            "/clear - Clear conversation history\n\n"
-            "*🎯 I can help with:*\n"
-            "📝 Text messages - Share your travel ideas\n"
-            "🔗 Links - Send me travel websites or articles\n"
-            "📸 Photos - AI-powered image analysis (menus, destinations)\n"
-            "👥 Group chats - Collaborative planning\n"
-            "📋 Structured plans - Detailed JSON-based itineraries\n\n"
-            "*Example:* `/plan 5 days in Tokyo, budget travel, love food and culture`\n\n"
-            "I use AI with conversation memory and structured planning!"
-        )
-        await update.message.reply_text(help_message, parse_mode="Markdown")
+        await update.message.reply_text(_HELP_MESSAGE, parse_mode=_PM_MARKDOWN)
 
     async def history_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show recent conversation history"""
-        chat_id = update.effective_chat.id
-        user_name = update.effective_user.first_name or "User"
+        chat_id, _, user_name = self._extract_update_context(update)
         
         # Get recent context
-        recent_context = conversation_memory.get_recent_context(chat_id, max_messages=10)
+        recent_lines = conversation_memory.get_recent_context_lines(chat_id, max_messages=10)
         
-        if recent_context == "No previous conversation history.":
+        if not recent_lines:
             await update.message.reply_text(
                 f"No conversation history found, {user_name}. Start chatting to build our travel planning context!"
             )
@@ -78,6 +779,7 @@ class MessageHandlers:
             # Get travel context summary
             travel_context = conversation_memory.get_travel_context_summary(chat_id)
             
+            recent_context = "\n".join(recent_lines)
             response = f"📋 *Recent Conversation History*\n\n{recent_context}\n\n"
             
             # Add travel context summary if available
@@ -93,12 +795,11 @@ class MessageHandlers:
                 if travel_context["links_shared"] > 0:
                     response += f"• Links shared: {travel_context['links_shared']}\n"
             
-            await update.message.reply_text(response, parse_mode="Markdown")
+            await update.message.reply_text(response, parse_mode=_PM_MARKDOWN)
 
     async def clear_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Clear conversation history"""
-        chat_id = update.effective_chat.id
-        user_name = update.effective_user.first_name or "User"
+        chat_id, _, user_name = self._extract_update_context(update)
         
         conversation_memory.clear_conversation(chat_id)
         
@@ -109,21 +810,13 @@ class MessageHandlers:
 
     async def plan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Generate a structured travel plan"""
-        chat_id = update.effective_chat.id
-        user_name = update.effective_user.first_name or "User"
+        chat_id, chat_type, user_name = self._extract_update_context(update)
         
         # Get user requirements from command arguments
         user_requirements = " ".join(context.args) if context.args else ""
         
         if not user_requirements:
-            await update.message.reply_text(
-                f"🗺️ To generate a travel plan, please provide some details!\n\n"
-                f"Examples:\n"
-                f"• `/plan 5 days in Tokyo, budget travel, love food and culture`\n"
-                f"• `/plan weekend trip to Paris for couple, moderate budget`\n"
-                f"• `/plan family vacation to Thailand, 1 week, beaches and temples`\n\n"
-                f"Or just tell me about your travel ideas and I'll create a plan based on our conversation!"
-            )
+            await update.message.reply_text(_PLAN_USAGE_TEXT)
             return
         
         try:
@@ -135,7 +828,7 @@ class MessageHandlers:
             # Build context for plan generation
             plan_context = {
                 "chat_id": chat_id,
-                "chat_type": update.effective_chat.type,
+                "chat_type": chat_type,
                 "user_name": user_name
             }
             
@@ -144,19 +837,19 @@ class MessageHandlers:
                 plan_context, user_requirements
             )
             
-            # Delete generating message
-            await generating_msg.delete()
-            
-            # Format and send plan summary
-            plan_summary = self._format_plan_summary(travel_plan)
-            await update.message.reply_text(plan_summary, parse_mode="Markdown")
+            # Delete generating message and send plan summary concurrently
+            plan_summary, plan_title, plan_id = self._format_plan_summary(travel_plan)
+            await asyncio.gather(
+                generating_msg.delete(),
+                update.message.reply_text(plan_summary, parse_mode=_PM_HTML)
+            )
             
             # Store plan reference in conversation memory
             conversation_memory.add_assistant_message(
                 chat_id=chat_id,
-                content=f"Generated travel plan: {travel_plan.title} (ID: {travel_plan.id})",
+                content=f"Generated travel plan: {plan_title} (ID: {plan_id})",
                 message_type="plan_generation",
-                metadata={"plan_id": travel_plan.id}
+                metadata={"plan_id": plan_id}
             )
             
         except Exception as e:
@@ -168,8 +861,7 @@ class MessageHandlers:
 
     async def plans_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """List all saved travel plans for this chat"""
-        chat_id = update.effective_chat.id
-        user_name = update.effective_user.first_name or "User"
+        chat_id, _, user_name = self._extract_update_context(update)
         
         # Get all plans for this chat
         plans = plan_storage.get_chat_plans(chat_id)
@@ -186,7 +878,8 @@ class MessageHandlers:
         response = f"📋 *Your Travel Plans* ({len(plans)} total)\n\n"
         
         for i, plan in enumerate(plans, 1):
-            created_date = plan.created_at.strftime("%b %d")
+            created_at = plan.created_at
+            created_date = f"{_MONTH_ABBR[created_at.month]} {created_at.day:02d}"
             response += (
                 f"{i}. *{plan.title}*\n"
                 f"   📍 {plan.destination} • ⏱️ {plan.duration}\n"
@@ -196,19 +889,14 @@ class MessageHandlers:
         
         response += f"Use `/viewplan <ID>` to see full details of any plan!"
         
-        await update.message.reply_text(response, parse_mode="Markdown")
+        await update.message.reply_text(response, parse_mode=_PM_MARKDOWN)
 
     async def viewplan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """View detailed travel plan by ID"""
-        chat_id = update.effective_chat.id
-        user_name = update.effective_user.first_name or "User"
+        chat_id, _, user_name = self._extract_update_context(update)
         
         if not context.args:
-            await update.message.reply_text(
-                f"Please specify a plan ID!\n\n"
-                f"Usage: `/viewplan <plan_id>`\n"
-                f"Use `/plans` to see all your plan IDs."
-            )
+            await update.message.reply_text(_VIEWPLAN_USAGE_TEXT)
             return
         
         plan_id = context.args[0]
@@ -224,25 +912,21 @@ class MessageHandlers:
         # Format detailed plan
         detailed_plan = self._format_detailed_plan(travel_plan)
         
-        # Split long messages if needed
+        # Split long messages if needed; the Markdown is split before conversion
+        # so a cut can never land inside an HTML tag or entity
         if len(detailed_plan) > 4000:
             parts = self._split_long_message(detailed_plan)
             for part in parts:
-                await update.message.reply_text(part, parse_mode="Markdown")
+                await update.message.reply_text(_markdown_to_html(part), parse_mode=_PM_HTML)
         else:
-            await update.message.reply_text(detailed_plan, parse_mode="Markdown")
+            await update.message.reply_text(_markdown_to_html(detailed_plan), parse_mode=_PM_HTML)
 
     async def deleteplan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Delete a travel plan"""
-        chat_id = update.effective_chat.id
-        user_name = update.effective_user.first_name or "User"
+        chat_id, _, user_name = self._extract_update_context(update)
         
         if not context.args:
-            await update.message.reply_text(
-                f"Please specify a plan ID to delete!\n\n"
-                f"Usage: `/deleteplan <plan_id>`\n"
-                f"Use `/plans` to see all your plan IDs."
-            )
+            await update.message.reply_text(_DELETEPLAN_USAGE_TEXT)
             return
         
         plan_id = context.args[0]
@@ -261,25 +945,31 @@ class MessageHandlers:
             await update.message.reply_text(
                 f"✅ Deleted travel plan: *{travel_plan.title}*\n"
                 f"Plan ID: `{plan_id}`",
-                parse_mode="Markdown"
+                parse_mode=_PM_MARKDOWN
             )
         else:
             await update.message.reply_text(
                 f"❌ Failed to delete plan `{plan_id}`. Please try again."
             )
 
-    def _format_plan_summary(self, plan) -> str:
-        """Format travel plan summary for display"""
-        summary = f"🎯 *{plan.title}*\n\n"
-        summary += f"📍 *Destination:* {plan.destination}\n"
-        summary += f"⏱️ *Duration:* {plan.duration}\n"
-        summary += f"👥 *Travel Type:* {plan.travel_type.value.title()}\n"
-        summary += f"💰 *Budget Level:* {plan.budget_level.value.title()}\n"
-        summary += f"🆔 *Plan ID:* `{plan.id}`\n\n"
-        
-        summary += f"*Overview:*\n{plan.overview}\n\n"
+    def _format_plan_summary(self, plan) -> Tuple[str, str, str]:
+        """Format travel plan summary for display as Telegram HTML
         
-        summary += f"*Budget Estimate:* {plan.total_budget_estimate}\n\n"
+        Returns:
+            Tuple of (summary text, plan title, plan ID) so callers can log the
+            plan without reading the model again
+        """
+        title, plan_id = plan.title, plan.id
+        parts: List[str] = [
+            f"🎯 *{title}*\n\n",
+            f"📍 *Destination:* {plan.destination}\n",
+            f"⏱️ *Duration:* {plan.duration}\n",
+            f"👥 *Travel Type:* {plan.travel_type.display_name}\n",
+            f"💰 *Budget Level:* {plan.budget_level.display_name}\n",
+            f"🆔 *Plan ID:* `{plan_id}`\n\n",
+            f"*Overview:*\n{plan.overview}\n\n",
+            f"*Budget Estimate:* {plan.total_budget_estimate}\n\n",
+        ]
         
         # Add first day preview
         if plan.itinerary:
@@ -292,7 +982,7 @@ class MessageHandlers:
                 theme = first_day.get('theme', 'Activities')
                 activities = first_day.get('activities', [])
             
-            summary += f"*Day 1 Preview - {theme}:*\n"
+            parts.append(f"*Day 1 Preview - {theme}:*\n")
             
             for i, activity in enumerate(activities[:2], 1):  # Show first 2 activities
                 if hasattr(activity, 'name'):
@@ -302,212 +992,155 @@ class MessageHandlers:
                     activity_name = activity.get('name', 'Activity')
                     activity_duration = activity.get('duration', 'TBD')
                     
-                summary += f"{i}. {activity_name} ({activity_duration})\n"
+                parts.append(f"{i}. {activity_name} ({activity_duration})\n")
                 
             if len(activities) > 2:
-                summary += f"... and {len(activities) - 2} more activities\n"
-            summary += "\n"
+                parts.append(f"... and {len(activities) - 2} more activities\n")
+            parts.append("\n")
         
-        summary += f"📋 Use `/viewplan {plan.id}` for complete details\n"
-        summary += f"📚 Use `/plans` to see all your plans"
+        parts.append(f"📋 Use `/viewplan {plan_id}` for complete details\n")
+        parts.append("📚 Use `/plans` to see all your plans")
         
-        return summary
+        return _markdown_to_html("".join(parts)), title, plan_id
 
     def _format_detailed_plan(self, plan) -> str:
-        """Format detailed travel plan for display"""
-        details = f"🗺️ *{plan.title}*\n"
-        details += f"_Plan ID: {plan.id} | Created by {plan.created_by}_\n\n"
-        
-        details += f"📍 *Destination:* {plan.destination}\n"
-        details += f"⏱️ *Duration:* {plan.duration}\n"
-        details += f"👥 *Type:* {plan.travel_type.value.title()} ({plan.group_size} people)\n"
-        details += f"💰 *Budget:* {plan.budget_level.value.title()} - {plan.total_budget_estimate}\n\n"
-        
-        details += f"*📖 Overview:*\n{plan.overview}\n\n"
+        """Format detailed travel plan for display, in the bot's Markdown (see _markdown_to_html)"""
+        parts: List[str] = [
+            f"🗺️ *{plan.title}*\n",
+            f"_Plan ID: {plan.id} | Created by {plan.created_by}_\n\n",
+            f"📍 *Destination:* {plan.destination}\n",
+            f"⏱️ *Duration:* {plan.duration}\n",
+            f"👥 *Type:* {plan.travel_type.display_name} ({plan.group_size} people)\n",
+            f"💰 *Budget:* {plan.budget_level.display_name} - {plan.total_budget_estimate}\n\n",
+            f"*📖 Overview:*\n{plan.overview}\n\n",
+        ]
         
         # Accommodations
         if plan.accommodations:
-            details += "*🏨 Accommodations:*\n"
+            parts.append("*🏨 Accommodations:*\n")
+            # Handle both dict and Pydantic model formats, decided once per section
+            read_acc = _section_row_reader(plan.accommodations, _ACCOMMODATION_FIELDS)
             for acc in plan.accommodations[:2]:  # Show first 2
-                if hasattr(acc, 'name'):
-                    acc_name = acc.name or 'Hotel'
-                    acc_type = acc.type or 'hotel'
-                    acc_location = acc.location or 'TBD'
-                    acc_price = acc.price_range or 'TBD'
-                else:
-                    acc_name = acc.get('name', 'Hotel')
-                    acc_type = acc.get('type', 'hotel')
-                    acc_location = acc.get('location', 'TBD')
-                    acc_price = acc.get('price_range', 'TBD')
-                    
-                details += f"• *{acc_name}* ({acc_type})\n"
-                details += f"  📍 {acc_location} | 💰 {acc_price}\n"
-            details += "\n"
+                acc_name, acc_type, acc_location, acc_price = read_acc(acc)
+                parts.append(
+                    f"• *{acc_name}* ({acc_type})\n"
+                    f"  📍 {acc_location} | 💰 {acc_price}\n"
+                )
+            parts.append("\n")
         
         # Itinerary preview
         if plan.itinerary:
-            details += "*📅 Itinerary Highlights:*\n"
+            parts.append("*📅 Itinerary Highlights:*\n")
+            read_day = _section_row_reader(plan.itinerary, _DAY_FIELDS)
+            read_activity = None
             for day in plan.itinerary[:3]:  # Show first 3 days
-                if hasattr(day, 'day'):
-                    day_num = day.day or '?'
-                    day_theme = day.theme or 'Activities'
-                    activities = day.activities or []
-                    daily_cost = day.estimated_cost or 'TBD'
-                else:
-                    day_num = day.get('day', '?')
-                    day_theme = day.get('theme', 'Activities')
-                    activities = day.get('activities', [])
-                    daily_cost = day.get('estimated_cost', 'TBD')
-                
-                details += f"*Day {day_num}:* {day_theme}\n"
+                day_num, day_theme, activities, daily_cost = read_day(day)
+                parts.append(f"*Day {day_num}:* {day_theme}\n")
                 
+                if activities and read_activity is None:
+                    read_activity = _section_row_reader(activities, _ACTIVITY_FIELDS)
                 for activity in activities[:2]:  # Show first 2 activities per day
-                    if hasattr(activity, 'name'):
-                        activity_name = activity.name or 'Activity'
-                        activity_cost = activity.cost or 'TBD'
-                    else:
-                        activity_name = activity.get('name', 'Activity')
-                        activity_cost = activity.get('cost', 'TBD')
-                        
-                    details += f"• {activity_name} ({activity_cost})\n"
+                    activity_name, activity_cost = read_activity(activity)
+                    parts.append(f"• {activity_name} ({activity_cost})\n")
                     
-                details += f"💰 Daily estimate: {daily_cost}\n\n"
+                parts.append(f"💰 Daily estimate: {daily_cost}\n\n")
         
         # Packing and tips
         if plan.packing_list:
-            details += "*🎒 Packing Essentials:*\n"
-            for item in plan.packing_list[:5]:  # Show first 5 items
-                details += f"• {item}\n"
-            details += "\n"
+            parts.append("*🎒 Packing Essentials:*\n")
+            parts.extend(f"• {item}\n" for item in plan.packing_list[:5])  # Show first 5 items
+            parts.append("\n")
         
         if plan.local_tips:
-            details += "*💡 Local Tips:*\n"
-            for tip in plan.local_tips[:3]:  # Show first 3 tips
-                details += f"• {tip}\n"
+            parts.append("*💡 Local Tips:*\n")
+            parts.extend(f"• {tip}\n" for tip in plan.local_tips[:3])  # Show first 3 tips
         
-        return details
+        return "".join(parts)
 
     def _split_long_message(self, message: str, max_length: int = 4000) -> List[str]:
-        """Split long message into multiple parts"""
+        """Split long message into multiple parts, cutting at line breaks when possible"""
         if len(message) <= max_length:
             return [message]
         
         parts = []
-        current_part = ""
-        
-        for line in message.split('\n'):
-            if len(current_part) + len(line) + 1 > max_length:
-                if current_part:
-                    parts.append(current_part.strip())
-                current_part = line + '\n'
+        start = 0
+        length = len(message)
+        
+        while length - start > max_length:
+            # Cut at the last newline that keeps the chunk within max_length
+            cut = message.rfind('\n', start, start + max_length)
+            if cut <= start:
+                # No usable line break, hard cut the oversized line
+                cut = start + max_length
+                next_start = cut
             else:
-                current_part += line + '\n'
+                next_start = cut + 1
+            
+            part = message[start:cut].strip()
+            if part:
+                parts.append(part)
+            start = next_start
         
-        if current_part:
-            parts.append(current_part.strip())
+        tail = message[start:].strip()
+        if tail:
+            parts.append(tail)
         
         return parts
 
     async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle inline keyboard button presses"""
         query = update.callback_query
-        await query.answer()  # Answer the callback query
+        # Parse callback data (cached) so the acknowledgement can depend on the action
+        callback_data = inline_keyboard_service.parse_callback_data(query.data)
+        action = callback_data.get("action", "")
+        value = callback_data.get("value", "")
+        
+        # Dismiss the button spinner without making the handler wait on it; slow
+        # actions also get an immediate toast while the LLM works
+        if action in _SLOW_CALLBACK_ACTIONS or query.data in _SLOW_CALLBACK_DATA:
+            _spawn_background(query.answer(text=_PROCESSING_TOAST_TEXT, cache_time=0))
+        else:
+            _spawn_background(query.answer())
         
         try:
-            # Parse callback data
-            callback_data = inline_keyboard_service.parse_callback_data(query.data)
-            action = callback_data.get("action", "")
-            value = callback_data.get("value", "")
-            
-            user_name = update.effective_user.first_name or "User"
-            chat_id = update.effective_chat.id
+
+            chat_id, _, user_name = self._extract_update_context(update)
             
             # Format user's choice as natural text
             user_choice = inline_keyboard_service.format_user_answer(action, value)
             
-            # Store user's selection in conversation memory
-            conversation_memory.add_user_message(
-                chat_id=chat_id,
-                content=user_choice,
-                message_type="button_selection",
-                user_name=user_name,
-                metadata={"action": action, "value": value}
-            )
-            
-            # Handle different callback actions
-            if action == "plan":
-                # User wants to generate a plan
-                await self._handle_generate_plan_callback(query, context, user_name, chat_id)
-                
-            elif action == "more":
-                # User wants more information
-                await self._handle_more_info_callback(query, context, user_name, chat_id)
-                
-            elif action in ["dest", "dur", "budg", "grp", "int", "date", "flight", "airline", "airport", "time"]:
-                # User answered a specific question
-                await self._handle_question_answer_callback(
-                    query, context, action, value, user_choice, user_name, chat_id
+            # Batch the selection and whatever the handler stores for this turn
+            with conversation_memory.batch(chat_id):
+                # Store user's selection in conversation memory
+                conversation_memory.add_user_message(
+                    chat_id=chat_id,
+                    content=user_choice,
+                    message_type="button_selection",
+                    user_name=user_name,
+                    metadata={"action": action, "value": value}
                 )
                 
-            elif action == "flight_choice":
-                # User selected a flight option
-                await self._handle_flight_choice_callback(
-                    query, context, value, user_choice, user_name, chat_id
-                )
-            
-            elif action == "quick_flight":
-                # User clicked quick flight search button
-                await self._handle_quick_flight_callback(
-                    query, context, user_name, chat_id
-                )
-            
-            elif action == "book_hotel":
-                # User clicked book hotel button
-                await self._handle_book_hotel_callback(
-                    query, context, user_name, chat_id
-                )
-            
-            elif action == "weather":
-                # User clicked weather button
-                await self._handle_weather_callback(
-                    query, context, user_name, chat_id
-                )
-            
-            elif action == "share_loc":
-                # User clicked share location button
-                await self._handle_share_location_callback(
-                    query, context, user_name, chat_id
-                )
-            
-            elif action == "hotel_ui":
-                # User clicked hotel UI button
-                await self._handle_hotel_ui_callback(
-                    query, context, user_name, chat_id
-                )
-            
-            elif action in ["set_city", "set_budget", "set_location", "set_tags", "set_checkin", 
-                           "set_checkout", "set_party", "set_extras", "generate_recommendation",
-                           "toggle_tag", "set_adults", "set_children", "set_rooms", "toggle_facility",
-                           "set_view", "set_open_after", "set_brand", "confirm_children_yes",
-                           "confirm_children_no", "add_child_age", "custom_city", "custom_budget",
-                           "custom_location", "confirm_tags", "confirm_party", "confirm_extras",
-                           "confirm_facilities", "confirm_view", "confirm_brand", "confirm_open_after",
-                           "back_main", "back_extras", "change_hotels", "compare_hotels"]:
-                # User clicked new hotel UI button
-                await self._handle_new_hotel_ui_callback(
-                    query, context, user_name, chat_id
-                )
-            
-            # Try to remove the inline keyboard (optional) - but not for hotel_ui
-            if action != "hotel_ui":
-                try:
-                    await query.edit_message_reply_markup(reply_markup=None)
-                except BadRequest:
-                    pass  # Message too old or already modified
+                # Dispatch to the handler registered for this action. Handlers edit the
+                # message text themselves, which also replaces the inline keyboard in
+                # the same request, so no separate keyboard edit is needed.
+                handler = self._callback_dispatch.get(action)
+                answer_handler = self._answer_callback_dispatch.get(action)
+                if handler is not None:
+                    await handler(query, context, user_name, chat_id)
+                elif answer_handler is not None:
+                    await answer_handler(
+                        query, context, action, value, user_choice, user_name, chat_id
+                    )
+                else:
+                    # Unknown action, just drop the stale keyboard
+                    try:
+                        await query.edit_message_reply_markup(reply_markup=None)
+                    except BadRequest:
+                        pass  # Message too old or already modified
                 
         except Exception as e:
             logger.error(f"Error handling callback query: {e}")
-            await query.edit_message_text("Sorry, something went wrong processing your selection.")
+            await query.edit_message_text(_CALLBACK_ERROR_TEXT)
 
     async def _handle_generate_plan_callback(
         self, 
@@ -519,7 +1152,7 @@ class MessageHandlers:
         """Handle generate plan button press"""
         
         # Update the message to show we're working
-        await query.edit_message_text("🎯 *Generating your travel plan...* ✈️", parse_mode="Markdown")
+        await query.edit_message_text("🎯 *Generating your travel plan...* ✈️", parse_mode=_PM_MARKDOWN)
         
         try:
             # Build context for plan generation
@@ -535,15 +1168,15 @@ class MessageHandlers:
             )
             
             # Format and send plan summary
-            plan_summary = self._format_plan_summary(travel_plan)
-            await query.edit_message_text(plan_summary, parse_mode="Markdown")
+            plan_summary, plan_title, plan_id = self._format_plan_summary(travel_plan)
+            await query.edit_message_text(plan_summary, parse_mode=_PM_HTML)
             
             # Store plan reference in conversation memory
             conversation_memory.add_assistant_message(
                 chat_id=chat_id,
-                content=f"Generated travel plan: {travel_plan.title} (ID: {travel_plan.id})",
+                content=f"Generated travel plan: {plan_title} (ID: {plan_id})",
                 message_type="plan_generation",
-                metadata={"plan_id": travel_plan.id}
+                metadata={"plan_id": plan_id}
             )
             
         except Exception as e:
@@ -575,7 +1208,7 @@ class MessageHandlers:
                 "Tell me more helpful travel information", llm_context, "text"
             )
             
-            await query.edit_message_text(response, parse_mode="Markdown")
+            await query.edit_message_text(response, parse_mode=_PM_MARKDOWN)
             
         except Exception as e:
             logger.error(f"Error generating more info: {e}")
@@ -611,15 +1244,19 @@ class MessageHandlers:
                 acknowledgment_prompt, llm_context, "text"
             )
             
-            await query.edit_message_text(
-                f"Great choice! {response}", 
-                parse_mode="Markdown"
+            # Show the response while new follow-up questions are generated
+            edit_task = asyncio.create_task(
+                query.edit_message_text(
+                    f"Great choice! {response}", 
+                    parse_mode=_PM_MARKDOWN
+                )
             )
             
             # Generate new follow-up questions based on this answer
             questions_data = await follow_up_service.generate_structured_follow_up_questions(
                 user_choice, response, llm_context, max_questions=2
             )
+            await edit_task
             
             # Send new inline keyboard if we have more questions
             if questions_data:
@@ -633,7 +1270,7 @@ class MessageHandlers:
                         chat_id=chat_id,
                         text=follow_up_text,
                         reply_markup=keyboard,
-                        parse_mode="Markdown"
+                        parse_mode=_PM_MARKDOWN
                     )
                     
         except Exception as e:
@@ -645,26 +1282,21 @@ class MessageHandlers:
     async def handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle text messages with LLM-generated responses"""
         message_text = update.message.text
-        chat_type = update.effective_chat.type
-        chat_id = update.effective_chat.id
-        user_name = update.effective_user.first_name or "User"
+        chat_id, chat_type, user_name = self._extract_update_context(update)
         
-        # Check if bot is mentioned in the message
-        bot_mentioned = self._is_bot_mentioned(update, context)
-        
-        # Only respond if bot is mentioned (except in private chats)
-        if chat_type != "private" and not bot_mentioned:
+        # Only respond if bot is mentioned (except in private chats, where the
+        # mention check is skipped entirely)
+        if chat_type != "private" and not self._is_bot_mentioned(update, context):
             logger.info(f"Bot not mentioned in {chat_type} chat, ignoring message")
             return
         
-        # Check if message contains URLs
-        urls = re.findall(
-            r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
-            message_text
-        )
-        
         logger.info(f"Received text from {user_name} in {chat_type}: {message_text[:50]}...")
         
+        # Check if message contains URLs; the substring test skips the regex for most messages
+        urls: List[str] = []
+        if "://" in message_text:
+            urls = _URL_RE.findall(message_text)
+        
         # Determine message type
         message_type = "link" if urls else "text"
         
@@ -692,7 +1324,7 @@ class MessageHandlers:
         # Check if user is in hotel UI input mode
         if "awaiting" in context.user_data:
             awaiting = context.user_data["awaiting"]
-            if awaiting in ["city", "budget"]:
+            if awaiting in _HOTEL_UI_INPUT_LABELS:
                 # Handle hotel UI text input
                 await self._handle_hotel_ui_text_input(
                     update, context, message_text, awaiting, user_name, chat_id
@@ -706,101 +1338,255 @@ class MessageHandlers:
             logger.info("New hotel UI interface shown, returning early")
             return
         
+        # Coalesce rapid bursts: a message arriving while the previous one from
+        # this user in this chat is still in its debounce window replaces that
+        # pending reply; other users in a group get their own replies
+        user = update.effective_user
+        burst_key = (chat_id, user.id if user else None)
+        pending = self._pending_text.get(burst_key)
+        if pending is not None:
+            pending_task, buffered = pending
+            pending_task.cancel()
+            buffered.append((message_text, urls))
+        else:
+            buffered = [(message_text, urls)]
+        task = _spawn_background(
+            self._reply_to_text_burst(update, buffered, llm_context, user_name, burst_key)
+        )
+        self._pending_text[burst_key] = (task, buffered)
+
+    async def _reply_to_text_burst(
+        self,
+        update: Update,
+        buffered: List[Tuple[str, List[str]]],
+        llm_context: dict,
+        user_name: str,
+        burst_key: Tuple[int, Optional[int]]
+    ):
+        """Wait out the debounce window, then answer all buffered (text, urls) as one message"""
         try:
-            # Generate response WITHOUT follow-up questions (we'll add them separately)
-            response = await self.llm_service.generate_travel_response_without_followup(
-                message_text, llm_context, message_type
+            await asyncio.sleep(_TEXT_DEBOUNCE_SECONDS)
+        finally:
+            # Later messages start a new burst once this one stops waiting
+            if self._pending_text.get(burst_key, (None,))[0] is asyncio.current_task():
+                del self._pending_text[burst_key]
+        
+        chat_id = burst_key[0]
+        message_text = "\n".join(text for text, _ in buffered)
+        # A link anywhere in the burst makes the whole burst a link message
+        urls = list(dict.fromkeys(url for _, message_urls in buffered for url in message_urls))
+        llm_context["urls"] = urls
+        message_type = "link" if urls else "text"
+        if len(buffered) > 1:
+            logger.info(f"Coalesced {len(buffered)} rapid messages from chat {chat_id}")
+        
+        # Generate the structured follow-up questions while the response streams;
+        # they are independent LLM calls
+        follow_up_task = asyncio.create_task(
+            follow_up_service.generate_structured_follow_up_questions(
+                message_text, None, llm_context, max_questions=3
             )
-            
-            # Generate structured follow-up questions for inline keyboards
-            questions_data = await follow_up_service.generate_structured_follow_up_questions(
-                message_text, response, llm_context, max_questions=3
+        )
+        
+        placeholder = None
+        replied = False
+        try:
+            # Stream the response (without follow-ups) into a placeholder message
+            placeholder = await update.message.reply_text(_STREAM_PLACEHOLDER_TEXT)
+            response = await self._stream_text_response(
+                placeholder, message_text, llm_context, message_type
             )
+            edit_placeholder = _edit_reply(placeholder)
+            
+            async def reply(text: str, **kwargs) -> Message:
+                nonlocal replied
+                result = await edit_placeholder(text, **kwargs)
+                replied = True
+                return result
+            
+            try:
+                questions_data = await follow_up_task
+            except Exception as e:
+                logger.error(f"Error generating follow-up questions: {e}")
+                questions_data = []
+            
+            # Flight option buttons depend on the response itself
+            if response:
+                questions_data = (
+                    follow_up_service.get_flight_option_questions(response) or questions_data
+                )
             
             # Create and send inline keyboard if we have questions
+            keyboard = None
             if questions_data:
                 keyboard = inline_keyboard_service.create_follow_up_keyboard(
                     questions_data, chat_id, llm_context
                 )
-                
-                if keyboard:
-                    # If we have a main response, send it first, then the keyboard
-                    if response and response.strip():
-                        await update.message.reply_text(response, parse_mode="Markdown")
-                        follow_up_text = "💡 *你更倾向哪个方案？*"
-                        await update.message.reply_text(
-                            follow_up_text,
+            
+            if keyboard:
+                # If we have a main response, attach the prompt and keyboard to it
+                # in one message; fall back to two messages if it would be too long
+                if response:
+                    combined = f"{response}\n\n{_FOLLOW_UP_PROMPT_TEXT}"
+                    if len(combined) <= _MAX_MESSAGE_LENGTH:
+                        await reply(
+                            combined,
                             reply_markup=keyboard,
-                            parse_mode="Markdown"
+                            parse_mode=_PM_MARKDOWN
                         )
                     else:
-                        # If no main response, send keyboard with a default message
-                        follow_up_text = "💡 *你更倾向哪个方案？*"
+                        await reply(response, parse_mode=_PM_MARKDOWN)
                         await update.message.reply_text(
-                            follow_up_text,
+                            _FOLLOW_UP_PROMPT_TEXT,
                             reply_markup=keyboard,
-                            parse_mode="Markdown"
+                            parse_mode=_PM_MARKDOWN
                         )
+                else:
+                    # If no main response, send keyboard with a default message
+                    await reply(
+                        _FOLLOW_UP_PROMPT_TEXT,
+                        reply_markup=keyboard,
+                        parse_mode=_PM_MARKDOWN
+                    )
+            elif response:
+                # No follow-up questions, dispatch on the detected intent
+                intent = self._classify_response_intent(response, message_text)
+                await self._intent_dispatch[intent](
+                    update, response, message_text, chat_id, reply=reply
+                )
             else:
-                # No follow-up questions, check if we should add custom buttons
-                if response and response.strip():
-                    # Check if response contains hotel recommendations - use influencer hotel response for Instagram buttons
-                    # This ensures ANY response with hotel recommendations gets Instagram buttons, regardless of user's question
-                    hotel_response_keywords = ["酒店", "hotel", "住宿", "宾馆", "旅馆", "resort", "boutique", "accommodation", "lodging", "inn", "suite", "lodge"]
-                    
-                    # Check if response contains hotel recommendations
-                    is_hotel_response = any(keyword in response.lower() for keyword in hotel_response_keywords)
-                    
-                    if is_hotel_response:
-                        await self._send_influencer_hotel_response(update, response, message_text, chat_id)
-                    
-                    # Check if this is a general travel query that could benefit from custom buttons
-                    elif any(keyword in message_text.lower() for keyword in ["旅行", "旅游", "计划", "推荐", "帮助", "travel", "trip", "plan"]):
-                        # Add custom buttons for general travel assistance
-                        custom_keyboard = inline_keyboard_service.create_custom_buttons(
-                            chat_id, ["quick_flight", "book_hotel", "weather"]
-                        )
-                        
-                        if custom_keyboard:
-                            await update.message.reply_text(response, parse_mode="Markdown")
-                            await update.message.reply_text(
-                                "💡 *我还可以帮您：*",
-                                reply_markup=custom_keyboard,
-                                parse_mode="Markdown"
-                            )
-                        else:
-                            await update.message.reply_text(response, parse_mode="Markdown")
-                    else:
-                        await update.message.reply_text(response, parse_mode="Markdown")
+                # No response generated, send a default message with custom buttons
+                custom_keyboard = inline_keyboard_service.create_custom_buttons(
+                    chat_id, _TRAVEL_CUSTOM_BUTTONS
+                )
+                
+                if custom_keyboard:
+                    await reply(
+                        _NO_HELP_TEXT,
+                        reply_markup=custom_keyboard
+                    )
                 else:
-                    # No response generated, send a default message with custom buttons
-                    custom_keyboard = inline_keyboard_service.create_custom_buttons(
-                        chat_id, ["quick_flight", "book_hotel", "weather"]
+                    await reply(
+                        _NO_HELP_FALLBACK_TEXT
                     )
-                    
-                    if custom_keyboard:
-                        await update.message.reply_text(
-                            "🤔 我不太确定您想要什么帮助。让我为您提供一些选项：",
-                            reply_markup=custom_keyboard
-                        )
-                    else:
-                        await update.message.reply_text(
-                            "🤔 我不太确定您想要什么帮助。请告诉我您需要什么，我会尽力协助您！"
-                        )
             
         except Exception as e:
             logger.error(f"Error handling text message: {e}")
+            follow_up_task.cancel()
             fallback_response = (
                 f"Thanks for sharing, {user_name}! I'm excited to help you plan an amazing trip. "
                 "Could you tell me more about what you have in mind?"
             )
-            await update.message.reply_text(fallback_response)
+            if replied:
+                # The placeholder already shows the final answer; only a later
+                # message failed, and a fallback below it would read as a non-answer
+                return
+            if placeholder is not None:
+                # Replace the placeholder or partial stream instead of leaving it behind
+                try:
+                    await _edit_reply(placeholder)(fallback_response)
+                except TelegramError as edit_error:
+                    logger.warning(f"Could not replace the placeholder, sending fallback: {edit_error}")
+                    await update.message.reply_text(fallback_response)
+            else:
+                await update.message.reply_text(fallback_response)
+
+    async def _stream_text_response(
+        self,
+        placeholder: Message,
+        message_text: str,
+        llm_context: dict,
+        message_type: str
+    ) -> str:
+        """Stream the LLM response into the placeholder message
+        
+        Partial text is shown without a parse mode (unfinished Markdown would be
+        rejected), with edits throttled to respect Telegram's flood limits. The
+        caller sends the final formatted text. If the stream breaks off midway,
+        the partial text is replaced by a complete non-streamed response.
+        
+        Returns:
+            Stripped response text
+        """
+        parts: List[str] = []
+        length = shown = 0
+        last_edit = time.monotonic()
+        interrupted = False
+        # aclosing releases the stream's in-flight slot before any fallback request
+        async with aclosing(self.llm_service.stream_travel_response_without_followup(
+            message_text, llm_context, message_type
+        )) as stream:
+            try:
+                async for delta in stream:
+                    parts.append(delta)
+                    length += len(delta)
+                    now = time.monotonic()
+                    if length - shown >= _STREAM_EDIT_MIN_CHARS and now - last_edit >= _STREAM_EDIT_INTERVAL:
+                        try:
+                            await placeholder.edit_text("".join(parts)[:_MAX_MESSAGE_LENGTH])
+                        except BadRequest as e:
+                            logger.debug(f"Skipping streamed edit: {e}")
+                        shown, last_edit = length, now
+            except Exception as e:
+                logger.warning(f"Streamed response interrupted, retrying without streaming: {e}")
+                interrupted = True
+        
+        if interrupted:
+            # The non-streamed call records its response in conversation memory
+            response = await self.llm_service.generate_travel_response_without_followup(
+                message_text, llm_context, message_type
+            )
+            return response.strip()
+        
+        return "".join(parts).strip()
+
+    def _classify_response_intent(self, response: str, message_text: str) -> Optional[str]:
+        """Classify a generated response as "hotel", "travel" or None for dispatch"""
+        # ANY response with hotel recommendations gets Instagram buttons, regardless of user's question
+        if _HOTEL_KEYWORD_RE.search(response):
+            return "hotel"
+        
+        # General travel queries benefit from custom buttons
+        if _TRAVEL_QUERY_RE.search(message_text):
+            return "travel"
+        
+        return None
+
+    async def _send_travel_intent_response(
+        self, 
+        update: Update, 
+        response: str, 
+        message_text: str, 
+        chat_id: int,
+        reply: Optional[Callable[..., Awaitable[Any]]] = None
+    ):
+        """Send response followed by custom buttons for general travel assistance"""
+        custom_keyboard = inline_keyboard_service.create_custom_buttons(
+            chat_id, _TRAVEL_CUSTOM_BUTTONS
+        )
+        
+        await (reply or update.message.reply_text)(response, parse_mode=_PM_MARKDOWN)
+        if custom_keyboard:
+            await update.message.reply_text(
+                _MORE_HELP_TEXT,
+                reply_markup=custom_keyboard,
+                parse_mode=_PM_MARKDOWN
+            )
+
+    async def _send_default_response(
+        self, 
+        update: Update, 
+        response: str, 
+        message_text: str, 
+        chat_id: int,
+        reply: Optional[Callable[..., Awaitable[Any]]] = None
+    ):
+        """Send response as a plain Markdown reply"""
+        await (reply or update.message.reply_text)(response, parse_mode=_PM_MARKDOWN)
 
     async def handle_photo(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle photo messages with AI vision analysis"""
-        user_name = update.effective_user.first_name or "User"
-        chat_type = update.effective_chat.type
-        chat_id = update.effective_chat.id
+        chat_id, chat_type, user_name = self._extract_update_context(update)
         
         # Get photo info
         photo = update.message.photo[-1]  # Get the highest resolution photo
@@ -826,14 +1612,17 @@ class MessageHandlers:
         }
         
         try:
-            # Send "analyzing" message first
-            analyzing_msg = await update.message.reply_text(
-                f"📸 Analyzing your photo, {user_name}... This might take a moment!"
+            # Send "analyzing" message while the photo downloads under the shared limit
+            analyzing_msg, photo_base64 = await asyncio.gather(
+                update.message.reply_text(
+                    f"📸 Analyzing your photo, {user_name}... This might take a moment!"
+                ),
+                self._download_file_base64(context, photo.file_id)
             )
             
-            # Analyze photo with OpenAI Vision
-            response = await self.llm_service.analyze_photo(
-                context.bot, photo, caption, llm_context
+            # Analyze with OpenAI Vision
+            response = await self.llm_service.analyze_photo_base64(
+                photo_base64, caption, llm_context
             )
             
             # Store assistant response
@@ -843,9 +1632,11 @@ class MessageHandlers:
                 message_type="photo_analysis"
             )
             
-            # Delete the "analyzing" message and send the result
-            await analyzing_msg.delete()
-            await update.message.reply_text(response, parse_mode="Markdown")
+            # Delete the "analyzing" message and send the result concurrently
+            await asyncio.gather(
+                analyzing_msg.delete(),
+                update.message.reply_text(response, parse_mode=_PM_MARKDOWN)
+            )
             
         except Exception as e:
             logger.error(f"Error handling photo message: {e}")
@@ -857,9 +1648,7 @@ class MessageHandlers:
 
     async def handle_image_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle image files sent as documents with AI vision analysis"""
-        user_name = update.effective_user.first_name or "User"
-        chat_type = update.effective_chat.type
-        chat_id = update.effective_chat.id
+        chat_id, chat_type, user_name = self._extract_update_context(update)
         document = update.message.document
         
         logger.info(f"Received image document from {user_name} in {chat_type}: {document.file_name}")
@@ -894,19 +1683,17 @@ class MessageHandlers:
         }
         
         try:
-            # Send "analyzing" message first
-            analyzing_msg = await update.message.reply_text(
-                f"🖼️ Analyzing your image document, {user_name}... This might take a moment!"
+            # Send "analyzing" message while the document downloads under the shared limit
+            analyzing_msg, image_base64 = await asyncio.gather(
+                update.message.reply_text(
+                    f"🖼️ Analyzing your image document, {user_name}... This might take a moment!"
+                ),
+                self._download_file_base64(context, document.file_id)
             )
             
-            # Create a pseudo photo object for document analysis
-            # We'll download the document directly
-            file = await context.bot.get_file(document.file_id)
-            file_bytes = await file.download_as_bytearray()
-            
             # Use the same photo analysis but with document download
-            response = await self.llm_service.analyze_document_image(
-                file_bytes, document.file_name, llm_context
+            response = await self.llm_service.analyze_document_image_base64(
+                image_base64, document.file_name, llm_context
             )
             
             # Store assistant response
@@ -916,9 +1703,11 @@ class MessageHandlers:
                 message_type="document_analysis"
             )
             
-            # Delete the "analyzing" message and send the result
-            await analyzing_msg.delete()
-            await update.message.reply_text(response, parse_mode="Markdown")
+            # Delete the "analyzing" message and send the result concurrently
+            await asyncio.gather(
+                analyzing_msg.delete(),
+                update.message.reply_text(response, parse_mode=_PM_MARKDOWN)
+            )
             
         except Exception as e:
             logger.error(f"Error handling image document: {e}")
@@ -928,6 +1717,17 @@ class MessageHandlers:
             )
             await update.message.reply_text(fallback_response)
 
+    async def _download_file_base64(self, context: ContextTypes.DEFAULT_TYPE, file_id: str) -> str:
+        """Download a Telegram file as base64, bounded by the module-level download semaphore
+        
+        The raw buffer is released on return so only the encoded copy is held
+        while the vision request is in flight.
+        """
+        async with _DOWNLOAD_SEM:
+            file = await context.bot.get_file(file_id)
+            file_bytes = await file.download_as_bytearray()
+        return base64.b64encode(file_bytes).decode('ascii')
+
     async def error_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle errors"""
         logger.error(f"Update {update} caused error {context.error}")
@@ -946,6 +1746,7 @@ class MessageHandlers:
         self, 
         query, 
         context: ContextTypes.DEFAULT_TYPE, 
+        action: str, 
         value: str, 
         user_choice: str,
         user_name: str, 
@@ -953,6 +1754,7 @@ class MessageHandlers:
     ):
         """Handle flight option selection callback"""
         
+        followup_task = notification_task = None
         try:
             # Build context for response generation
             llm_context = {
@@ -961,36 +1763,47 @@ class MessageHandlers:
                 "user_name": user_name
             }
             
-            # Send notification in group chats
+            # Follow-up questions only depend on the user's choice, so start
+            # generating them while the main response is being produced
+            followup_task = asyncio.create_task(
+                follow_up_service.generate_structured_follow_up_questions(
+                    user_choice, f"User selected {value}", llm_context, max_questions=2
+                )
+            )
+            
+            # Send notification in group chats without blocking the main response
             if query.message.chat.type in ["group", "supergroup"]:
                 notification_text = f"👤 用户 {user_name} 选择了 {value}"
-                await query.message.reply_text(notification_text)
+                notification_task = asyncio.create_task(
+                    query.message.reply_text(notification_text)
+                )
             
             if value == "都不满意":
                 # User is not satisfied with any option
                 response = await self.llm_service.generate_travel_response_without_followup(
-                    "用户选择了'都不满意'，请提供其他航班选择或建议", llm_context, "text"
+                    "用户选择了'都不满意'，请提供其他航班选择或建议", llm_context, "text", use_cache=False
                 )
                 
                 await query.edit_message_text(
                     f"我理解您对当前方案不满意，{user_name}！{response}", 
-                    parse_mode="Markdown"
+                    parse_mode=_PM_MARKDOWN
                 )
             else:
                 # User selected a specific flight option
                 response = await self.llm_service.generate_travel_response_without_followup(
-                    f"用户选择了{value}，请提供该方案的详细信息、预订建议和后续步骤", llm_context, "text"
+                    f"用户选择了{value}，请提供该方案的详细信息、预订建议和后续步骤", llm_context, "text", use_cache=False
                 )
                 
                 await query.edit_message_text(
                     f"很好的选择！您选择了{value}。{response}", 
-                    parse_mode="Markdown"
+                    parse_mode=_PM_MARKDOWN
                 )
             
-            # Generate new follow-up questions based on this choice
-            questions_data = await follow_up_service.generate_structured_follow_up_questions(
-                user_choice, f"User selected {value}", llm_context, max_questions=2
-            )
+            if notification_task:
+                await notification_task
+            
+            # Collect the follow-up questions generated alongside the response
+            questions_data = await followup_task
             
             # Send new inline keyboard if we have more questions
             if questions_data:
@@ -1004,11 +1817,14 @@ class MessageHandlers:
                         chat_id=chat_id,
                         text=follow_up_text,
                         reply_markup=keyboard,
-                        parse_mode="Markdown"
+                        parse_mode=_PM_MARKDOWN
                     )
                     
         except Exception as e:
             logger.error(f"Error handling flight choice: {e}")
+            for task in (followup_task, notification_task):
+                if task is not None:
+                    task.cancel()
             await query.edit_message_text(
                 f"谢谢您的选择，{user_name}！如果您需要更多帮助，请随时告诉我。"
             )
@@ -1022,14 +1838,7 @@ class MessageHandlers:
     ):
         """Handle quick flight search button"""
         try:
-            await query.edit_message_text(
-                f"✈️ 好的，{user_name}！我来帮您快速查询航班。\n\n"
-                "请告诉我：\n"
-                "1. 出发城市和目的地\n"
-                "2. 出发日期\n"
-                "3. 是否往返（如果是，请提供返程日期）\n\n"
-                "例如：'上海到纽约，10月1号出发，10月5号返回'"
-            )
+            await query.edit_message_text(_QUICK_FLIGHT_PROMPT_TMPL.format(user_name=user_name))
         except Exception as e:
             logger.error(f"Error handling quick flight callback: {e}")
 
@@ -1042,15 +1851,7 @@ class MessageHandlers:
     ):
         """Handle book hotel button"""
         try:
-            await query.edit_message_text(
-                f"🏨 好的，{user_name}！我来帮您预订酒店。\n\n"
-                "请告诉我：\n"
-                "1. 目的地城市\n"
-                "2. 入住和退房日期\n"
-                "3. 房间数量和客人数量\n"
-                "4. 预算范围（可选）\n\n"
-                "例如：'纽约，10月1号到10月5号，2个房间，4个客人'"
-            )
+            await query.edit_message_text(_BOOK_HOTEL_PROMPT_TMPL.format(user_name=user_name))
         except Exception as e:
             logger.error(f"Error handling book hotel callback: {e}")
 
@@ -1063,13 +1864,7 @@ class MessageHandlers:
     ):
         """Handle weather button"""
         try:
-            await query.edit_message_text(
-                f"🌤️ 好的，{user_name}！我来帮您查看天气信息。\n\n"
-                "请告诉我：\n"
-                "1. 您想查询哪个城市的天气？\n"
-                "2. 需要查看哪几天的天气？（可选）\n\n"
-                "例如：'纽约的天气' 或 '东京10月1号到10月5号的天气'"
-            )
+            await query.edit_message_text(_WEATHER_PROMPT_TMPL.format(user_name=user_name))
         except Exception as e:
             logger.error(f"Error handling weather callback: {e}")
 
@@ -1082,15 +1877,7 @@ class MessageHandlers:
     ):
         """Handle share location button"""
         try:
-            await query.edit_message_text(
-                f"📍 好的，{user_name}！\n\n"
-                "请分享您的位置，这样我可以：\n"
-                "• 为您推荐附近的景点和餐厅\n"
-                "• 提供当地的交通信息\n"
-                "• 查看您当前位置的天气\n"
-                "• 规划从您当前位置出发的路线\n\n"
-                "请点击Telegram的'分享位置'按钮发送您的位置。"
-            )
+            await query.edit_message_text(_SHARE_LOCATION_PROMPT_TMPL.format(user_name=user_name))
         except Exception as e:
             logger.error(f"Error handling share location callback: {e}")
 
@@ -1106,88 +1893,14 @@ class MessageHandlers:
             callback_data = query.data
             
             # Initialize hotel slots if not exists
-            if "hotel_slots" not in context.user_data:
-                context.user_data["hotel_slots"] = {
-                    "city": None,
-                    "check_in": None,
-                    "nights": None,
-                    "check_out": None,
-                    "budget_range_local": None,
-                    "party": {"adults": 2, "children": 0, "rooms": 1},
-                }
-            
-            slots = context.user_data["hotel_slots"]
-            
-            if callback_data == "hotel_ui:back_main":
-                # Return to main menu
-                await query.edit_message_text(
-                    self.hotel_ui_service.get_initial_message(slots),
-                    reply_markup=self.hotel_ui_service.get_main_menu_keyboard()
-                )
-                return
+            slots = _get_hotel_slots(context.user_data)
             
-            elif callback_data == "hotel_ui:ask_city":
-                # Ask for city input
-                await query.edit_message_text(
-                    self.hotel_ui_service.get_city_input_message()
-                )
-                context.user_data["awaiting"] = "city"
+            handler = self._hotel_ui_dispatch.get(callback_data)
+            if handler:
+                await handler(query, context, slots, user_name, chat_id)
                 return
             
-            elif callback_data == "hotel_ui:ask_checkin":
-                # Show date selection
-                await query.edit_message_text(
-                    "📅 **请选择入住日期**\n\n选择未来14天内的日期：",
-                    reply_markup=self.hotel_ui_service.get_quick_dates_keyboard()
-                )
-                return
-            
-            elif callback_data == "hotel_ui:ask_nights":
-                # Show nights selection
-                await query.edit_message_text(
-                    "🛏 **请选择住宿晚数**\n\n选择您计划住几晚：",
-                    reply_markup=self.hotel_ui_service.get_nights_keyboard()
-                )
-                return
-            
-            elif callback_data == "hotel_ui:ask_budget":
-                # Show budget selection
-                await query.edit_message_text(
-                    "💰 **请选择每晚预算**\n\n选择您的预算范围：",
-                    reply_markup=self.hotel_ui_service.get_budget_keyboard()
-                )
-                return
-            
-            elif callback_data == "hotel_ui:ask_party":
-                # Show party selection
-                await query.edit_message_text(
-                    self.hotel_ui_service.get_summary_text(slots) + 
-                    "\n\n👪 **调整同行人数和房间数**\n\n使用下方按钮调整：",
-                    reply_markup=self.hotel_ui_service.get_party_keyboard()
-                )
-                return
-            
-            elif callback_data == "hotel_ui:custom_budget":
-                # Ask for custom budget
-                await query.edit_message_text(
-                    self.hotel_ui_service.get_budget_input_message()
-                )
-                context.user_data["awaiting"] = "budget"
-                return
-            
-            elif callback_data == "hotel_ui:done":
-                # Complete hotel search
-                await query.edit_message_text(
-                    self.hotel_ui_service.get_completion_message(slots)
-                )
-                
-                # Generate hotel recommendations using the collected slots
-                await self._generate_hotel_recommendations_from_slots(
-                    query, context, slots, user_name, chat_id
-                )
-                return
-            
-            # Handle slot updates (only if not handled by specific cases above)
+            # Anything other than a menu action is a slot update
             try:
                 if self.hotel_ui_service.update_slots_from_callback(slots, callback_data):
                     # Update successful, show updated summary
@@ -1213,13 +1926,75 @@ class MessageHandlers:
             
         except Exception as e:
             logger.error(f"Error handling hotel UI callback: {e}")
-            await query.edit_message_text("抱歉，处理您的选择时出现了错误。")
+            await query.edit_message_text(_HOTEL_UI_SELECTION_ERROR_TEXT)
+
+    async def _hotel_ui_back_main(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Return to the hotel UI main menu"""
+        await query.edit_message_text(
+            self.hotel_ui_service.get_initial_message(slots),
+            reply_markup=self.hotel_ui_service.get_main_menu_keyboard()
+        )
+
+    async def _hotel_ui_ask_city(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Ask for city input"""
+        await query.edit_message_text(
+            self.hotel_ui_service.get_city_input_message()
+        )
+        context.user_data["awaiting"] = "city"
+
+    async def _hotel_ui_ask_checkin(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Show date selection"""
+        await query.edit_message_text(
+            _CHECKIN_PROMPT_HTML,
+            reply_markup=self.hotel_ui_service.get_quick_dates_keyboard(),
+            parse_mode=_PM_HTML
+        )
+
+    async def _hotel_ui_ask_nights(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Show nights selection"""
+        await query.edit_message_text(
+            _NIGHTS_PROMPT_HTML,
+            reply_markup=self.hotel_ui_service.get_nights_keyboard(),
+            parse_mode=_PM_HTML
+        )
+
+    async def _hotel_ui_ask_budget(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Show budget selection"""
+        await query.edit_message_text(
+            _BUDGET_PROMPT_HTML,
+            reply_markup=self.hotel_ui_service.get_budget_keyboard(),
+            parse_mode=_PM_HTML
+        )
+
+    async def _hotel_ui_ask_party(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Show party selection"""
+        await query.edit_message_text(
+            html.escape(self.hotel_ui_service.get_summary_text(slots)) + _PARTY_PROMPT_HTML,
+            reply_markup=self.hotel_ui_service.get_party_keyboard(),
+            parse_mode=_PM_HTML
+        )
+
+    async def _hotel_ui_custom_budget(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Ask for custom budget"""
+        await query.edit_message_text(
+            self.hotel_ui_service.get_budget_input_message()
+        )
+        context.user_data["awaiting"] = "budget"
+
+    async def _hotel_ui_done(self, query, context, slots: HotelSlots, user_name: str, chat_id: int):
+        """Complete hotel search and generate recommendations from the collected slots"""
+        await query.edit_message_text(
+            self.hotel_ui_service.get_completion_message(slots)
+        )
+        await self._generate_hotel_recommendations_from_slots(
+            query, context, slots, user_name, chat_id
+        )
 
     async def _generate_hotel_recommendations_from_slots(
         self, 
         query, 
         context: ContextTypes.DEFAULT_TYPE, 
-        slots: dict, 
+        slots: HotelSlots, 
         user_name: str, 
         chat_id: int
     ):
@@ -1228,55 +2003,35 @@ class MessageHandlers:
             logger.info(f"Generating hotel recommendations from slots: {slots}")
             
             # Convert slots to hotel agent format - include all required fields
-            from app.services.hotel_agent import hotel_agent
-            default_slots = hotel_agent._initialize_slots()
-            
             hotel_slots = {
-                "city": slots.get("city"),
-                "check_in": slots.get("check_in"),
-                "check_out": slots.get("check_out"),
-                "party": slots.get("party", {"adults": 2, "children": 0, "rooms": 1}),
-                "budget_range_local": slots.get("budget_range_local"),
+                **_DEFAULT_HOTEL_SLOTS,
+                "city": slots.city,
+                "check_in": slots.check_in,
+                "check_out": slots.check_out,
+                "party": asdict(slots.party),
+                "budget_range_local": slots.budget_range_local,
                 "city_type": "A",  # Default to A tier
-                "star_level": default_slots["star_level"],
-                "preferred_area": default_slots["preferred_area"],
-                "preferred_brands": default_slots["preferred_brands"],
-                "special_needs": default_slots["special_needs"],
-                "view": default_slots["view"],
-                "breakfast_needed": default_slots["breakfast_needed"],
-                "style": default_slots["style"]
             }
             
             logger.info(f"Converted hotel_slots: {hotel_slots}")
             
-            # Use hotel agent to generate recommendations
-            hotel_agent.slots = hotel_slots
-            logger.info(f"Set hotel_agent.slots: {hotel_agent.slots}")
-            
-            # Generate hotel recommendations
-            # The method uses hotel_agent.slots internally, so we just need to pass any context
+            # Generate hotel recommendations from this request's slots, leaving
+            # the process-wide hotel_agent.slots untouched
             logger.info("Calling _generate_hotel_recommendations...")
-            recommendations = await self.llm_service._generate_hotel_recommendations({})
+            recommendations = await self.llm_service._generate_hotel_recommendations({}, hotel_slots)
             logger.info(f"Generated recommendations: {recommendations[:100] if recommendations else 'None'}...")
             
             if recommendations:
-                # Send recommendations with Instagram buttons
-                # Create a mock update object for the callback query
-                from telegram import Update
-                mock_update = Update(update_id=0, callback_query=query)
-                await self._send_influencer_hotel_response(
-                    mock_update, recommendations, slots.get("city", ""), chat_id
+                # Send recommendations with Instagram buttons under the callback's message
+                await self._reply_influencer_hotel_response(
+                    query.message.reply_text, recommendations, slots.city or ""
                 )
             else:
-                await query.edit_message_text(
-                    "抱歉，没有找到合适的酒店推荐。请尝试调整您的搜索条件。"
-                )
+                await query.edit_message_text(_NO_HOTEL_RECOMMENDATIONS_TEXT)
                 
         except Exception as e:
             logger.error(f"Error generating hotel recommendations: {e}")
-            await query.edit_message_text(
-                "抱歉，生成酒店推荐时出现了错误。请稍后重试。"
-            )
+            await query.edit_message_text(_HOTEL_RECOMMENDATIONS_ERROR_TEXT)
 
     async def _handle_hotel_ui_text_input(
         self, 
@@ -1290,17 +2045,7 @@ class MessageHandlers:
         """Handle hotel UI text input (city, budget)"""
         try:
             # Initialize hotel slots if not exists
-            if "hotel_slots" not in context.user_data:
-                context.user_data["hotel_slots"] = {
-                    "city": None,
-                    "check_in": None,
-                    "nights": None,
-                    "check_out": None,
-                    "budget_range_local": None,
-                    "party": {"adults": 2, "children": 0, "rooms": 1},
-                }
-            
-            slots = context.user_data["hotel_slots"]
+            slots = _get_hotel_slots(context.user_data)
             
             # Update slots based on input
             if self.hotel_ui_service.update_slots_from_text(slots, message_text, awaiting):
@@ -1309,30 +2054,26 @@ class MessageHandlers:
                 
                 # Send confirmation and show updated menu
                 await update.message.reply_text(
-                    f"✅ 已设置{'目的地' if awaiting == 'city' else '预算'}！\n\n" +
+                    f"✅ 已设置{_HOTEL_UI_INPUT_LABELS[awaiting]}！\n\n" +
                     self.hotel_ui_service.get_summary_text(slots),
                     reply_markup=self.hotel_ui_service.get_main_menu_keyboard()
                 )
             else:
+                input_message = (
+                    self.hotel_ui_service.get_city_input_message() if awaiting == "city"
+                    else self.hotel_ui_service.get_budget_input_message()
+                )
                 await update.message.reply_text(
-                    "❌ 输入格式不正确，请重新输入：\n\n" +
-                    (self.hotel_ui_service.get_city_input_message() if awaiting == "city" 
-                     else self.hotel_ui_service.get_budget_input_message())
+                    "❌ 输入格式不正确，请重新输入：\n\n" + input_message
                 )
                 
         except Exception as e:
             logger.error(f"Error handling hotel UI text input: {e}")
-            await update.message.reply_text("抱歉，处理您的输入时出现了错误。")
+            await update.message.reply_text(_HOTEL_UI_INPUT_ERROR_TEXT)
 
     def _is_hotel_related_message(self, message: str) -> bool:
         """Check if message is hotel-related"""
-        hotel_keywords = [
-            "酒店", "hotel", "住宿", "宾馆", "旅馆", "resort", "boutique", 
-            "accommodation", "lodging", "inn", "suite", "lodge", "预订酒店",
-            "推荐酒店", "酒店推荐", "订酒店", "找酒店", "酒店选择"
-        ]
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in hotel_keywords)
+        return _is_hotel_related_text(message)
 
     async def _show_hotel_ui_interface(
         self, 
@@ -1344,22 +2085,12 @@ class MessageHandlers:
         """Show hotel UI interface"""
         try:
             # Initialize hotel slots if not exists
-            if "hotel_slots" not in context.user_data:
-                context.user_data["hotel_slots"] = {
-                    "city": None,
-                    "check_in": None,
-                    "nights": None,
-                    "check_out": None,
-                    "budget_range_local": None,
-                    "party": {"adults": 2, "children": 0, "rooms": 1},
-                }
-            
-            slots = context.user_data["hotel_slots"]
+            slots = _get_hotel_slots(context.user_data)
             
             # Try to extract city from message
             city = self._extract_city_from_message(update.message.text)
             if city:
-                slots["city"] = city
+                slots.city = city
             
             await update.message.reply_text(
                 self.hotel_ui_service.get_initial_message(slots),
@@ -1368,7 +2099,7 @@ class MessageHandlers:
             
         except Exception as e:
             logger.error(f"Error showing hotel UI interface: {e}")
-            await update.message.reply_text("抱歉，显示酒店推荐界面时出现了错误。")
+            await update.message.reply_text(_HOTEL_UI_ERROR_TEXT)
     
     async def _show_new_hotel_ui_interface(
         self, 
@@ -1381,7 +2112,6 @@ class MessageHandlers:
         try:
             # 为每个用户创建独立的状态机实例
             if "hotel_state_machine" not in context.user_data:
-                from app.services.hotel_state_machine import HotelStateMachine
                 context.user_data["hotel_state_machine"] = HotelStateMachine()
             
             state_machine = context.user_data["hotel_state_machine"]
@@ -1397,12 +2127,12 @@ class MessageHandlers:
             await update.message.reply_text(
                 message,
                 reply_markup=keyboard,
-                parse_mode='Markdown'
+                parse_mode=_PM_MARKDOWN
             )
             
         except Exception as e:
             logger.error(f"Error showing new hotel UI interface: {e}")
-            await update.message.reply_text("抱歉，显示酒店推荐界面时出现了错误。")
+            await update.message.reply_text(_HOTEL_UI_ERROR_TEXT)
     
     async def _handle_new_hotel_ui_callback(
         self, 
@@ -1414,98 +2144,111 @@ class MessageHandlers:
         """处理新的酒店UI回调"""
         try:
             callback_data = query.data
-            logger.info(f"Handling new hotel UI callback: {callback_data}")
             
             # 为每个用户创建独立的状态机实例
             if "hotel_state_machine" not in context.user_data:
-                from app.services.hotel_state_machine import HotelStateMachine
                 context.user_data["hotel_state_machine"] = HotelStateMachine()
             
             state_machine = context.user_data["hotel_state_machine"]
             
             # 使用新的状态机处理回调
-            logger.info(f"Processing callback: {callback_data}")
             state, message, keyboard_data = state_machine.process_message(
                 None, callback_data
             )
             
-            logger.info(f"State machine returned: state={state}")
-            logger.info(f"Message length: {len(message)}, content: {message}")
-            logger.info(f"Keyboard data: {keyboard_data}")
-            
             # 获取键盘
             keyboard = hotel_ui_v2.get_keyboard(keyboard_data["type"])
-            logger.info(f"Generated keyboard type: {keyboard_data['type']}")
-            logger.info(f"Keyboard object: {keyboard}")
-            logger.info(f"Keyboard inline_keyboard: {keyboard.inline_keyboard if keyboard else 'None'}")
+            # 每次回调只输出一条汇总日志
+            trace = {
+                "cb": callback_data,
+                "state": state,
+                "msg_len": len(message),
+                "kb_type": keyboard_data["type"],
+            }
             
             # 检查键盘是否为空
             if keyboard is None:
-                logger.error(f"Keyboard is None for type: {keyboard_data['type']}")
+                logger.error("Keyboard is None for type: %s", keyboard_data["type"])
                 keyboard = hotel_ui_v2.get_keyboard("main_menu")  # 使用主菜单作为备用
-                logger.info(f"Using fallback keyboard: {keyboard}")
             
-            # 尝试编辑消息，如果失败则发送新消息
-            logger.info("Attempting to edit message...")
-            try:
-                await query.edit_message_text(
-                    message,
-                    reply_markup=keyboard,
-                    parse_mode='Markdown'
-                )
-                logger.info("✅ Successfully edited message with keyboard")
-            except Exception as edit_error:
-                logger.warning(f"❌ Edit message failed: {edit_error}")
-                logger.warning(f"Error type: {type(edit_error)}")
-                logger.warning(f"Error details: {str(edit_error)}")
-                # 编辑失败，发送新消息
-                logger.info("Attempting to send new message...")
-                try:
-                    await query.message.reply_text(
-                        message,
-                        reply_markup=keyboard,
-                        parse_mode='Markdown'
-                    )
-                    logger.info("✅ Successfully sent new message with keyboard")
-                except Exception as reply_error:
-                    logger.error(f"❌ Reply message also failed: {reply_error}")
-                    logger.error(f"Reply error type: {type(reply_error)}")
-                    # 最后的备用方案：发送简单消息
-                    try:
-                        await query.message.reply_text(
-                            "抱歉，显示预算选择时出现了问题。请重试。",
-                            reply_markup=keyboard
-                        )
-                    except Exception as final_error:
-                        logger.error(f"Final fallback also failed: {final_error}")
-                        # 最后的最后：只发送文本消息
-                        await query.message.reply_text(
-                            "抱歉，显示预算选择时出现了问题。请重试。"
-                        )
+            # 同一条消息已显示相同内容时跳过编辑（快速重复点击）
+            render_key = (query.message.chat_id, query.message.message_id)
+            render = (hash(message), hash(keyboard))
+            if self._last_render.get(render_key) == render:
+                trace["outcome"] = "unchanged"
+            else:
+                # 尝试编辑消息，如果失败则发送新消息
+                shown = await self._send_hotel_screen(query, message, keyboard)
+                if shown is not None:
+                    self._remember_render((shown.chat_id, shown.message_id), render)
+                trace["outcome"] = "shown" if shown is not None else "fallback"
+            logger.info("hotel_cb %s", trace)
             
         except Exception as e:
-            logger.error(f"Error handling new hotel UI callback: {e}")
+            logger.error("Error handling new hotel UI callback: %s", e)
             # 发送带键盘的错误消息
             try:
                 error_keyboard = hotel_ui_v2.get_keyboard("main_menu")
                 await query.edit_message_text(
-                    "抱歉，处理您的选择时出现了错误。请重试。",
+                    _SELECTION_ERROR_TEXT,
                     reply_markup=error_keyboard
                 )
             except:
-                await query.message.reply_text("抱歉，处理您的选择时出现了错误。请重试。")
+                await query.message.reply_text(_SELECTION_ERROR_TEXT)
+
+    async def _send_hotel_screen(self, query, text: str, keyboard) -> Optional[Message]:
+        """
+        Show a hotel state machine screen: edit the callback message, else reply
+        with it, else reply with a plain fallback text
+        
+        A RetryAfter is waited out with asyncio.sleep and the same step retried
+        once; it is re-raised if it recurs or hits the last step.
+        
+        Returns:
+            Message now showing text, or None if only the fallback text was sent
+        """
+        attempts = (
+            (query.edit_message_text, text, _PM_MARKDOWN),
+            (query.message.reply_text, text, _PM_MARKDOWN),
+            (query.message.reply_text, _BUDGET_DISPLAY_ERROR_TEXT, None),
+        )
+        last = len(attempts) - 1
+        step = 0
+        waited = False
+        while True:
+            send, body, parse_mode = attempts[step]
+            try:
+                sent = await send(body, reply_markup=keyboard, parse_mode=parse_mode)
+            except RetryAfter as e:
+                if waited or step == last:
+                    raise
+                waited = True
+                logger.warning("Rate limited showing hotel screen, retrying in %ss", e.retry_after)
+                await asyncio.sleep(e.retry_after)
+                continue
+            except BadRequest as e:
+                if step == 0 and "not modified" in str(e).lower():
+                    return query.message
+                if step == last:
+                    raise
+                logger.warning("❌ Hotel screen attempt %d failed: %s", step + 1, e)
+                step += 1
+                continue
+            if step == last:
+                return None
+            # Inline-message edits return True rather than the edited Message
+            return sent if isinstance(sent, Message) else query.message
+
+    def _remember_render(self, key: Tuple[int, int], render: Tuple[int, int]) -> None:
+        """Record the screen shown on a message, evicting the least recently used"""
+        self._last_render[key] = render
+        self._last_render.move_to_end(key)
+        if len(self._last_render) > _LAST_RENDER_MAX_ENTRIES:
+            self._last_render.popitem(last=False)
 
     def _extract_city_from_message(self, message: str) -> str:
         """Extract city name from message"""
-        # Simple city extraction - can be enhanced
-        cities = ["东京", "Tokyo", "上海", "Shanghai", "北京", "Beijing", "大阪", "Osaka", 
-                 "京都", "Kyoto", "箱根", "Hakone", "纽约", "New York", "巴黎", "Paris",
-                 "伦敦", "London", "新加坡", "Singapore", "香港", "Hong Kong", "台北", "Taipei"]
-        
-        for city in cities:
-            if city in message:
-                return city
-        return None
+        return _extract_location(message)[0]
 
     async def _send_hotel_response_with_media(
         self, 
@@ -1520,427 +2263,144 @@ class MessageHandlers:
             destination = self._extract_destination_from_message(message_text)
             
             if destination:
-                # Get real-time hotel info with TripAdvisor ratings
-                realtime_hotel_info = await self.llm_service.get_realtime_hotel_info(destination)
-                
-                # Send text response first
-                await update.message.reply_text(response, parse_mode="Markdown")
-                
-                # Send real-time hotel info with TripAdvisor ratings if available
-                if realtime_hotel_info:
-                    await update.message.reply_text(realtime_hotel_info, parse_mode="Markdown")
-                
-                # Get hotel media URLs for the destination
-                hotel_media_urls = self.llm_service.get_hotel_media_urls_for_destination(destination)
+                # Fetch real-time hotel info with TripAdvisor ratings while the
+                # text response goes out first
+                info_task = asyncio.create_task(
+                    self.llm_service.get_realtime_hotel_info(destination)
+                )
+                try:
+                    await update.message.reply_text(response, parse_mode=_PM_MARKDOWN)
+                except BaseException:
+                    info_task.cancel()
+                    raise
                 
-                # Send hotel image
-                await self.llm_service.send_media_with_text(
-                    bot=update.get_bot(),
-                    chat_id=chat_id,
-                    text="",  # No additional text
-                    media_type="photo",
-                    media_url=hotel_media_urls.get("photo"),
-                    caption=f"🏨 *{destination}的精选酒店* - 为您推荐优质住宿！",
-                    parse_mode="Markdown"
+                # Ratings and the hotel photo follow from the background so the
+                # handler returns as soon as the text response is out
+                _spawn_background(
+                    self._dispatch_hotel_media(update, destination, chat_id, info_task)
                 )
             else:
                 # Fallback to regular text response
-                await update.message.reply_text(response, parse_mode="Markdown")
+                await update.message.reply_text(response, parse_mode=_PM_MARKDOWN)
                 
         except Exception as e:
             logger.error(f"Error sending hotel response with media: {e}")
             # Fallback to regular text response
-            await update.message.reply_text(response, parse_mode="Markdown")
+            await update.message.reply_text(response, parse_mode=_PM_MARKDOWN)
+
+    async def _dispatch_hotel_media(
+        self,
+        update: Update,
+        destination: str,
+        chat_id: int,
+        info_task: "asyncio.Task[Optional[str]]"
+    ):
+        """Send real-time hotel info and the hotel photo after the text response"""
+        try:
+            realtime_hotel_info = await info_task
+            
+            # Send real-time hotel info with TripAdvisor ratings if available
+            if realtime_hotel_info:
+                await update.message.reply_text(realtime_hotel_info, parse_mode=_PM_MARKDOWN)
+            
+            # Get hotel media URLs for the destination
+            hotel_media_urls = self.llm_service.get_hotel_media_urls_for_destination(destination)
+            
+            # Send hotel image
+            await self.llm_service.send_media_with_text(
+                bot=update.get_bot(),
+                chat_id=chat_id,
+                text="",  # No additional text
+                media_type="photo",
+                media_url=hotel_media_urls.get("photo"),
+                caption=_hotel_caption(destination),
+                parse_mode=_PM_MARKDOWN
+            )
+        except Exception as e:
+            logger.error(f"Error sending hotel media for {destination}: {e}")
 
     def _extract_destination_from_message(self, message_text: str) -> str:
         """Extract destination from message text"""
-        message_lower = message_text.lower()
-        
-        # Map of destination keywords to normalized names
-        destination_map = {
-            "东京": "tokyo",
-            "tokyo": "tokyo",
-            "纽约": "new_york", 
-            "new york": "new_york",
-            "巴黎": "paris",
-            "paris": "paris",
-            "伦敦": "london",
-            "london": "london",
-            "大阪": "osaka",
-            "osaka": "osaka",
-            "京都": "kyoto",
-            "kyoto": "kyoto",
-            "名古屋": "nagoya",
-            "nagoya": "nagoya",
-            "首尔": "seoul",
-            "seoul": "seoul",
-            "新加坡": "singapore",
-            "singapore": "singapore",
-            "吉隆坡": "kuala_lumpur",
-            "kuala lumpur": "kuala_lumpur",
-            "曼谷": "bangkok",
-            "bangkok": "bangkok",
-            "台北": "taipei",
-            "taipei": "taipei",
-            "香港": "hong_kong",
-            "hong kong": "hong_kong",
-            "上海": "shanghai",
-            "shanghai": "shanghai",
-            "北京": "beijing",
-            "beijing": "beijing",
-            "深圳": "shenzhen",
-            "shenzhen": "shenzhen",
-            "广州": "guangzhou",
-            "guangzhou": "guangzhou",
-            "成都": "chengdu",
-            "chengdu": "chengdu",
-            "杭州": "hangzhou",
-            "hangzhou": "hangzhou",
-            "南京": "nanjing",
-            "nanjing": "nanjing",
-            "武汉": "wuhan",
-            "wuhan": "wuhan",
-            "西安": "xian",
-            "xian": "xian",
-            "重庆": "chongqing",
-            "chongqing": "chongqing",
-            "天津": "tianjin",
-            "tianjin": "tianjin",
-            "青岛": "qingdao",
-            "qingdao": "qingdao",
-            "大连": "dalian",
-            "dalian": "dalian",
-            "厦门": "xiamen",
-            "xiamen": "xiamen",
-            "苏州": "suzhou",
-            "suzhou": "suzhou",
-            "无锡": "wuxi",
-            "wuxi": "wuxi",
-            "宁波": "ningbo",
-            "ningbo": "ningbo",
-            "温州": "wenzhou",
-            "wenzhou": "wenzhou",
-            "福州": "fuzhou",
-            "fuzhou": "fuzhou",
-            "济南": "jinan",
-            "jinan": "jinan",
-            "石家庄": "shijiazhuang",
-            "shijiazhuang": "shijiazhuang",
-            "太原": "taiyuan",
-            "taiyuan": "taiyuan",
-            "呼和浩特": "hohhot",
-            "hohhot": "hohhot",
-            "沈阳": "shenyang",
-            "shenyang": "shenyang",
-            "长春": "changchun",
-            "changchun": "changchun",
-            "哈尔滨": "harbin",
-            "harbin": "harbin",
-            "合肥": "hefei",
-            "hefei": "hefei",
-            "南昌": "nanchang",
-            "nanchang": "nanchang",
-            "郑州": "zhengzhou",
-            "zhengzhou": "zhengzhou",
-            "长沙": "changsha",
-            "changsha": "changsha",
-            "南宁": "nanning",
-            "nanning": "nanning",
-            "海口": "haikou",
-            "haikou": "haikou",
-            "三亚": "sanya",
-            "sanya": "sanya",
-            "贵阳": "guiyang",
-            "guiyang": "guiyang",
-            "昆明": "kunming",
-            "kunming": "kunming",
-            "拉萨": "lhasa",
-            "lhasa": "lhasa",
-            "兰州": "lanzhou",
-            "lanzhou": "lanzhou",
-            "西宁": "xining",
-            "xining": "xining",
-            "银川": "yinchuan",
-            "yinchuan": "yinchuan",
-            "乌鲁木齐": "urumqi",
-            "urumqi": "urumqi",
-            "富国岛": "phu_quoc",
-            "phu quoc": "phu_quoc",
-            "phuquoc": "phu_quoc",
-            "巴厘岛": "bali",
-            "bali": "bali",
-            "巴厘": "bali",
-            # 东南亚
-            "普吉岛": "phuket",
-            "phuket": "phuket",
-            "苏梅岛": "koh_samui",
-            "koh samui": "koh_samui",
-            "清迈": "chiang_mai",
-            "chiang mai": "chiang_mai",
-            "清莱": "chiang_rai",
-            "chiang rai": "chiang_rai",
-            "甲米": "krabi",
-            "krabi": "krabi",
-            "华欣": "hua_hin",
-            "hua hin": "hua_hin",
-            "芭提雅": "pattaya",
-            "pattaya": "pattaya",
-            "马尼拉": "manila",
-            "manila": "manila",
-            "宿务": "cebu",
-            "cebu": "cebu",
-            "长滩岛": "boracay",
-            "boracay": "boracay",
-            "河内": "hanoi",
-            "hanoi": "hanoi",
-            "胡志明市": "ho_chi_minh",
-            "ho chi minh": "ho_chi_minh",
-            "岘港": "da_nang",
-            "da nang": "da_nang",
-            "会安": "hoi_an",
-            "hoi an": "hoi_an",
-            "芽庄": "nha_trang",
-            "nha trang": "nha_trang",
-            "大叻": "da_lat",
-            "da lat": "da_lat",
-            "雅加达": "jakarta",
-            "jakarta": "jakarta",
-            "日惹": "yogyakarta",
-            "yogyakarta": "yogyakarta",
-            "泗水": "surabaya",
-            "surabaya": "surabaya",
-            "棉兰": "medan",
-            "medan": "medan",
-            "槟城": "penang",
-            "penang": "penang",
-            "马六甲": "malacca",
-            "malacca": "malacca",
-            "兰卡威": "langkawi",
-            "langkawi": "langkawi",
-            "沙巴": "sabah",
-            "sabah": "sabah",
-            "沙捞越": "sarawak",
-            "sarawak": "sarawak",
-            # 东亚
-            "福冈": "fukuoka",
-            "fukuoka": "fukuoka",
-            "广岛": "hiroshima",
-            "hiroshima": "hiroshima",
-            "札幌": "sapporo",
-            "sapporo": "sapporo",
-            "仙台": "sendai",
-            "sendai": "sendai",
-            "横滨": "yokohama",
-            "yokohama": "yokohama",
-            "神户": "kobe",
-            "kobe": "kobe",
-            "奈良": "nara",
-            "nara": "nara",
-            "冲绳": "okinawa",
-            "okinawa": "okinawa",
-            "釜山": "busan",
-            "busan": "busan",
-            "济州岛": "jeju",
-            "jeju": "jeju",
-            "大邱": "daegu",
-            "daegu": "daegu",
-            "光州": "gwangju",
-            "gwangju": "gwangju",
-            "大田": "daejeon",
-            "daejeon": "daejeon",
-            "仁川": "incheon",
-            "incheon": "incheon",
-            # 欧洲
-            "罗马": "rome",
-            "rome": "rome",
-            "米兰": "milan",
-            "milan": "milan",
-            "威尼斯": "venice",
-            "venice": "venice",
-            "佛罗伦萨": "florence",
-            "florence": "florence",
-            "那不勒斯": "naples",
-            "naples": "naples",
-            "巴塞罗那": "barcelona",
-            "barcelona": "barcelona",
-            "马德里": "madrid",
-            "madrid": "madrid",
-            "塞维利亚": "seville",
-            "seville": "seville",
-            "柏林": "berlin",
-            "berlin": "berlin",
-            "慕尼黑": "munich",
-            "munich": "munich",
-            "汉堡": "hamburg",
-            "hamburg": "hamburg",
-            "阿姆斯特丹": "amsterdam",
-            "amsterdam": "amsterdam",
-            "鹿特丹": "rotterdam",
-            "rotterdam": "rotterdam",
-            "布鲁塞尔": "brussels",
-            "brussels": "brussels",
-            "维也纳": "vienna",
-            "vienna": "vienna",
-            "萨尔茨堡": "salzburg",
-            "salzburg": "salzburg",
-            "苏黎世": "zurich",
-            "zurich": "zurich",
-            "日内瓦": "geneva",
-            "geneva": "geneva",
-            "布拉格": "prague",
-            "prague": "prague",
-            "布达佩斯": "budapest",
-            "budapest": "budapest",
-            "华沙": "warsaw",
-            "warsaw": "warsaw",
-            "斯德哥尔摩": "stockholm",
-            "stockholm": "stockholm",
-            "哥本哈根": "copenhagen",
-            "copenhagen": "copenhagen",
-            "奥斯陆": "oslo",
-            "oslo": "oslo",
-            "赫尔辛基": "helsinki",
-            "helsinki": "helsinki",
-            "莫斯科": "moscow",
-            "moscow": "moscow",
-            "圣彼得堡": "st_petersburg",
-            "st petersburg": "st_petersburg",
-            # 北美
-            "洛杉矶": "los_angeles",
-            "los angeles": "los_angeles",
-            "旧金山": "san_francisco",
-            "san francisco": "san_francisco",
-            "拉斯维加斯": "las_vegas",
-            "las vegas": "las_vegas",
-            "迈阿密": "miami",
-            "miami": "miami",
-            "芝加哥": "chicago",
-            "chicago": "chicago",
-            "波士顿": "boston",
-            "boston": "boston",
-            "华盛顿": "washington_dc",
-            "washington dc": "washington_dc",
-            "西雅图": "seattle",
-            "seattle": "seattle",
-            "多伦多": "toronto",
-            "toronto": "toronto",
-            "温哥华": "vancouver",
-            "vancouver": "vancouver",
-            "蒙特利尔": "montreal",
-            "montreal": "montreal",
-            # 大洋洲
-            "悉尼": "sydney",
-            "sydney": "sydney",
-            "墨尔本": "melbourne",
-            "melbourne": "melbourne",
-            "布里斯班": "brisbane",
-            "brisbane": "brisbane",
-            "珀斯": "perth",
-            "perth": "perth",
-            "阿德莱德": "adelaide",
-            "adelaide": "adelaide",
-            "奥克兰": "auckland",
-            "auckland": "auckland",
-            "惠灵顿": "wellington",
-            "wellington": "wellington",
-            "基督城": "christchurch",
-            "christchurch": "christchurch",
-            # 中东
-            "迪拜": "dubai",
-            "dubai": "dubai",
-            "阿布扎比": "abu_dhabi",
-            "abu dhabi": "abu_dhabi",
-            "多哈": "doha",
-            "doha": "doha",
-            "科威特": "kuwait",
-            "kuwait": "kuwait",
-            "利雅得": "riyadh",
-            "riyadh": "riyadh",
-            "吉达": "jeddah",
-            "jeddah": "jeddah",
-            "伊斯坦布尔": "istanbul",
-            "istanbul": "istanbul",
-            "安卡拉": "ankara",
-            "ankara": "ankara",
-            # 非洲
-            "开罗": "cairo",
-            "cairo": "cairo",
-            "开普敦": "cape_town",
-            "cape town": "cape_town",
-            "约翰内斯堡": "johannesburg",
-            "johannesburg": "johannesburg",
-            "内罗毕": "nairobi",
-            "nairobi": "nairobi",
-            "拉各斯": "lagos",
-            "lagos": "lagos",
-            # 南美
-            "圣保罗": "sao_paulo",
-            "sao paulo": "sao_paulo",
-            "里约热内卢": "rio_de_janeiro",
-            "rio de janeiro": "rio_de_janeiro",
-            "布宜诺斯艾利斯": "buenos_aires",
-            "buenos aires": "buenos_aires",
-            "利马": "lima",
-            "lima": "lima",
-            "圣地亚哥": "santiago",
-            "santiago": "santiago",
-            "波哥大": "bogota",
-            "bogota": "bogota",
-            "加拉加斯": "caracas",
-            "caracas": "caracas"
-        }
-        
-        for keyword, normalized_name in destination_map.items():
-            if keyword in message_lower:
-                return normalized_name
-        
-        return None
+        return _extract_location(message_text)[1]
 
     async def _send_influencer_hotel_response(
         self, 
         update: Update, 
         response: str, 
         message_text: str, 
-        chat_id: int
+        chat_id: int,
+        reply: Optional[Callable[..., Awaitable[Any]]] = None
     ):
         """Send influencer hotel response with social media data"""
+        await self._reply_influencer_hotel_response(
+            reply or update.message.reply_text, response, message_text
+        )
+
+    async def _reply_influencer_hotel_response(
+        self,
+        reply: Callable[..., Awaitable[Any]],
+        response: str,
+        message_text: str
+    ):
+        """Reply with an influencer hotel response through the given reply_text callable"""
         try:
             # Extract destination from message
             destination = self._extract_destination_from_message(message_text)
             
             if destination:
                 # Get Instagram buttons for hotels
-                instagram_buttons = await self.llm_service._get_instagram_buttons_for_hotels(response, destination)
+                reply_markup = await self._get_instagram_markup(response, destination)
                 
-                if instagram_buttons:
-                    # Create Instagram buttons
-                    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                    keyboard = []
-                    for button_data in instagram_buttons:
-                        keyboard.append([InlineKeyboardButton(
-                            button_data["text"], 
-                            url=button_data["url"]
-                        )])
-                    
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
+                if reply_markup:
                     # Send text response with Instagram buttons in one message
-                    await update.message.reply_text(
+                    await reply(
                         response,
                         reply_markup=reply_markup,
-                        parse_mode="Markdown"
+                        parse_mode=_PM_MARKDOWN
                     )
                 else:
                     # Fallback to regular response
-                    await update.message.reply_text(response, parse_mode="Markdown")
+                    await reply(response, parse_mode=_PM_MARKDOWN)
             else:
                 # Fallback to regular response
-                await update.message.reply_text(response, parse_mode="Markdown")
+                await reply(response, parse_mode=_PM_MARKDOWN)
                 
         except Exception as e:
             logger.error(f"Error sending influencer hotel response: {e}")
             # Fallback to regular response
-            await update.message.reply_text(response, parse_mode="Markdown")
+            await reply(response, parse_mode=_PM_MARKDOWN)
+
+    async def _get_instagram_markup(self, response: str, destination: str) -> Optional[InlineKeyboardMarkup]:
+        """Instagram buttons for hotels named in response, cached per (destination, response)"""
+        key = (destination, hashlib.blake2b(response.encode(), digest_size=16).digest())
+        reply_markup = self._instagram_markups.get(key)
+        if reply_markup is not None:
+            self._instagram_markups.move_to_end(key)
+            return reply_markup
+        
+        instagram_buttons = await self.llm_service._get_instagram_buttons_for_hotels(response, destination)
+        if not instagram_buttons:
+            return None
+        reply_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(button_data["text"], url=button_data["url"])]
+            for button_data in instagram_buttons
+        ])
+        self._instagram_markups[key] = reply_markup
+        if len(self._instagram_markups) > _INSTAGRAM_MARKUP_MAX_ENTRIES:
+            self._instagram_markups.popitem(last=False)
+        return reply_markup
+
+    def _get_mention_re(self, context: ContextTypes.DEFAULT_TYPE) -> re.Pattern:
+        """Return one pattern for @bot_username, @all and @everyone, rebuilt only if the username changes"""
+        bot_username = context.bot.username
+        if not bot_username:
+            return _GROUP_MENTION_RE
+        if bot_username != self._bot_username:
+            self._bot_username = bot_username
+            self._bot_mention_re = re.compile(
+                rf"@{re.escape(bot_username)}\b|{_GROUP_MENTION_PATTERN}", re.IGNORECASE
+            )
+        return self._bot_mention_re
 
     def _is_bot_mentioned(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
         """
@@ -1958,29 +2418,13 @@ class MessageHandlers:
             if not message:
                 return False
             
-            # Check for @mentions in the message text
-            if message.text:
-                # Get bot username
-                bot_username = context.bot.username
-                if bot_username:
-                    # Check for @bot_username in the message
-                    if f"@{bot_username}" in message.text:
-                        return True
-                
-                # Check for @all or @everyone (common group mentions)
-                if "@all" in message.text.lower() or "@everyone" in message.text.lower():
-                    return True
-            
-            # Check for entities (mentions, hashtags, etc.)
-            if message.entities:
-                for entity in message.entities:
-                    if entity.type == "mention":
-                        # Extract the mentioned username
-                        mentioned_username = message.text[entity.offset:entity.offset + entity.length]
-                        if mentioned_username == f"@{context.bot.username}":
-                            return True
-            
-            return False
+            text = message.text
+            if not text:
+                return False
+            
+            # One scan for @bot_username, @all and @everyone; a "mention" entity
+            # for the bot is always found by this scan as well
+            return self._get_mention_re(context).search(text) is not None
             
         except Exception as e:
             logger.error(f"Error checking bot mention: {e}")
@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(slots=True)
+class Party:
+    """Travelling party for a hotel booking"""
+    adults: int = 2
+    children: int = 0
+    rooms: int = 1
+
+
+@dataclass(slots=True)
+class HotelSlots:
+    """Hotel booking details collected by the hotel UI, stored per user"""
+    city: Optional[str] = None
+    check_in: Optional[str] = None
+    nights: Optional[int] = None
+    check_out: Optional[str] = None
+    budget_range_local: Optional[str] = None
+    party: Party = field(default_factory=Party)
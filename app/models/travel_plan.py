@@ -1,6 +1,7 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, date
-from pydantic import BaseModel, Field
+from functools import cached_property
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -11,6 +12,11 @@ class TravelType(str, Enum):
     GROUP = "group"
     BUSINESS = "business"
 
+    @cached_property
+    def display_name(self) -> str:
+        """Title-cased label for rendering, computed once per member"""
+        return self.value.title()
+
 
 class BudgetLevel(str, Enum):
     BUDGET = "budget"
@@ -18,6 +24,11 @@ class BudgetLevel(str, Enum):
     LUXURY = "luxury"
     UNLIMITED = "unlimited"
 
+    @cached_property
+    def display_name(self) -> str:
+        """Title-cased label for rendering, computed once per member"""
+        return self.value.title()
+
 
 class ActivityType(str, Enum):
     SIGHTSEEING = "sightseeing"
@@ -31,16 +42,20 @@ class ActivityType(str, Enum):
 
 
 class Accommodation(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="Name of the accommodation")
     type: str = Field(..., description="Type (hotel, hostel, apartment, etc.)")
     location: str = Field(..., description="Location/area")
     price_range: str = Field(..., description="Price range per night")
     rating: Optional[float] = Field(None, description="Rating out of 5")
-    amenities: List[str] = Field(default_factory=list, description="Key amenities")
+    amenities: Tuple[str, ...] = Field(default=(), description="Key amenities")
     booking_notes: Optional[str] = Field(None, description="Booking tips or notes")
 
 
 class Activity(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="Activity name")
     type: ActivityType = Field(..., description="Activity category")
     location: str = Field(..., description="Location")
@@ -52,6 +67,8 @@ class Activity(BaseModel):
 
 
 class Transportation(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     method: str = Field(..., description="Transportation method")
     from_location: str = Field(..., description="Starting point")
     to_location: str = Field(..., description="Destination")
@@ -61,17 +78,20 @@ class Transportation(BaseModel):
 
 
 class DayItinerary(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     day: int = Field(..., description="Day number")
     date: Optional[str] = Field(None, description="Date (if known)")
     theme: str = Field(..., description="Day theme or focus")
-    activities: List[Activity] = Field(..., description="Activities for the day")
-    meals: List[str] = Field(default_factory=list, description="Meal recommendations")
-    transportation: List[Transportation] = Field(default_factory=list, description="Transportation needed")
+    activities: Tuple[Activity, ...] = Field(..., description="Activities for the day")
+    meals: Tuple[str, ...] = Field(default=(), description="Meal recommendations")
+    transportation: Tuple[Transportation, ...] = Field(default=(), description="Transportation needed")
     estimated_cost: str = Field(..., description="Estimated daily cost")
     tips: Optional[str] = Field(None, description="Daily tips")
 
 
 class TravelPlan(BaseModel):
+    # Left mutable: PlanStorage assigns id, version and user updates in place
     id: str = Field(..., description="Unique plan identifier")
     title: str = Field(..., description="Travel plan title")
     destination: str = Field(..., description="Main destination")
@@ -102,6 +122,8 @@ class TravelPlan(BaseModel):
 
 class PlanSummary(BaseModel):
     """Lightweight plan summary for listings"""
+    model_config = ConfigDict(frozen=True)
+
     id: str
     title: str
     destination: str
@@ -114,6 +136,8 @@ class PlanSummary(BaseModel):
 
 class PlanUpdate(BaseModel):
     """Model for plan updates/modifications"""
+    model_config = ConfigDict(frozen=True)
+
     plan_id: str
     updates: Dict[str, Any] = Field(..., description="Fields to update")
     update_reason: str = Field(..., description="Reason for the update")
@@ -0,0 +1,6 @@
+import hashlib
+
+
+def prompt_version(text: str) -> str:
+    """Short content hash identifying one revision of a prompt, logged next to the calls using it"""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
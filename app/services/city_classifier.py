@@ -3,16 +3,39 @@
 
 import json
 import os
+import re
+from functools import lru_cache
 from typing import Dict, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Searched in this order; the first city whose name or keyword matches wins
+_TIER_KEYS = ('A_class_cities', 'B_class_cities', 'C_class_cities')
+
+# Words showing the user already stated hotel preferences; matched in a single
+# pass over the lowercased message
+_PREFERENCE_KEYWORDS = frozenset(keyword.lower() for keyword in (
+    "预算", "budget", "价格", "price", "星级", "star", "rating",
+    "位置", "location", "商圈", "district", "品牌", "brand", "万豪", "marriott",
+    "希尔顿", "hilton", "凯悦", "hyatt", "洲际", "intercontinental",
+    "奢华", "luxury", "豪华", "deluxe", "经济", "economy", "商务", "business",
+    "附近", "nearby", "便利", "convenient", "交通", "transport", "市中心", "downtown",
+    "机场", "airport", "景点", "attraction", "购物", "shopping", "商业", "commercial"
+))
+_PREFERENCE_KEYWORD_RE = re.compile("|".join(map(re.escape, sorted(_PREFERENCE_KEYWORDS))))
+
 class CityClassifier:
     """City classifier based on hotel count data"""
     
     def __init__(self):
         self.classification_data = self._load_classification_data()
+        self._alias_index = self._build_alias_index(self.classification_data)
+        self._fallback_rules = self.classification_data.get('fallback_rules', {})
+        self._default_tier = self._fallback_rules.get('default_tier', 'C')
+        # Per-instance memo keyed by the normalized name; fallback entries are
+        # built (and logged) once per unknown city instead of on every call
+        self._classify_normalized = lru_cache(maxsize=1024)(self._lookup_normalized)
     
     def _load_classification_data(self) -> Dict:
         """Load city classification data from JSON file"""
@@ -20,8 +43,9 @@ class CityClassifier:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             data_file = os.path.join(current_dir, '..', 'data', 'city_classification.json')
             
-            with open(data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # One read of the raw bytes; json.loads decodes the UTF-8 itself
+            with open(data_file, 'rb') as f:
+                data = json.loads(f.read())
             
             logger.info(f"Loaded city classification data with {len(data.get('A_class_cities', {}).get('cities', {}))} A-class cities")
             return data
@@ -29,6 +53,18 @@ class CityClassifier:
             logger.error(f"Error loading city classification data: {e}")
             return self._get_fallback_data()
     
+    @staticmethod
+    def _build_alias_index(data: Dict) -> Dict[str, Tuple[str, Dict]]:
+        """Map every lowercased city name and keyword to its (tier, city_info)"""
+        index: Dict[str, Tuple[str, Dict]] = {}
+        for tier in _TIER_KEYS:
+            for city_key, city_info in data.get(tier, {}).get('cities', {}).items():
+                entry = (city_info['tier'], city_info)
+                index.setdefault(city_key.lower(), entry)
+                for keyword in city_info.get('keywords', []):
+                    index.setdefault(keyword.lower(), entry)
+        return index
+
     def _get_fallback_data(self) -> Dict:
         """Fallback data if JSON file cannot be loaded"""
         return {
@@ -51,27 +87,18 @@ class CityClassifier:
         Returns:
             Tuple of (tier, city_info)
         """
-        city_name_lower = city_name.lower().strip()
-        
-        # Search through all city categories
-        for tier in ['A_class_cities', 'B_class_cities', 'C_class_cities']:
-            cities = self.classification_data.get(tier, {}).get('cities', {})
-            
-            for city_key, city_info in cities.items():
-                # Check exact match
-                if city_name_lower == city_key.lower():
-                    return city_info['tier'], city_info
-                
-                # Check keywords
-                keywords = city_info.get('keywords', [])
-                if any(city_name_lower == keyword.lower() for keyword in keywords):
-                    return city_info['tier'], city_info
-        
+        return self._classify_normalized(city_name.lower().strip())
+
+    def _lookup_normalized(self, city_name_lower: str) -> Tuple[str, Dict]:
+        """Classify an already lowercased and stripped city name"""
+        hit = self._alias_index.get(city_name_lower)
+        if hit is not None:
+            return hit
+
         # Fallback for unknown cities
-        fallback_rules = self.classification_data.get('fallback_rules', {})
-        default_tier = fallback_rules.get('default_tier', 'C')
-        
-        logger.info(f"City '{city_name}' not found in classification data, using fallback tier: {default_tier}")
+        default_tier = self._default_tier
+
+        logger.info(f"City '{city_name_lower}' not found in classification data, using fallback tier: {default_tier}")
         
         return default_tier, {
             'hotel_count': 0,
@@ -121,26 +148,8 @@ class CityClassifier:
         
         # For A and B class cities, check if user has already provided preferences
         if tier in ["A", "B"]:
-            # Check if user message contains preference information
-            preference_keywords = [
-                "预算", "budget", "价格", "price", "星级", "star", "星级", "rating",
-                "位置", "location", "商圈", "district", "品牌", "brand", "万豪", "marriott",
-                "希尔顿", "hilton", "凯悦", "hyatt", "洲际", "intercontinental",
-                "奢华", "luxury", "豪华", "deluxe", "经济", "economy", "商务", "business",
-                "附近", "nearby", "便利", "convenient", "交通", "transport", "市中心", "downtown",
-                "机场", "airport", "景点", "attraction", "购物", "shopping", "商业", "commercial"
-            ]
-            
             # If user message contains preference keywords, don't ask for more info
-            if any(keyword in user_message.lower() for keyword in preference_keywords):
-                return False
-            
-            # If user message is very specific (contains hotel names, specific requests)
-            specific_keywords = ["推荐", "recommend", "酒店", "hotel", "住宿", "accommodation"]
-            if any(keyword in user_message.lower() for keyword in specific_keywords):
-                return True
-            
-            return True
+            return _PREFERENCE_KEYWORD_RE.search(user_message.lower()) is None
         
         # For C class cities, don't collect preferences
         return False
@@ -185,8 +194,7 @@ class CityClassifier:
 （B类城市可以不用主要问品牌要求，因为可选品牌可能不多）"""
         
         else:  # C class
-            fallback_rules = self.classification_data.get('fallback_rules', {})
-            message = fallback_rules.get('message', '该城市酒店数量有限，以下是可行的3-5家推荐')
+            message = self._fallback_rules.get('message', '该城市酒店数量有限，以下是可行的3-5家推荐')
             return f"""{message}"""
     
     def get_city_statistics(self) -> Dict:
@@ -1,13 +1,26 @@
 import logging
-from typing import Dict, List, Optional, Any
+import re
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Deque, Dict, Iterator, List, Optional, Any
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 import json
 
 logger = logging.getLogger(__name__)
 
+# Travel-context cues, matched as substrings of the lowercased message
+_TRAVEL_VERB_RE = re.compile(r"visit|go to|trip to|travel to")
+_BUDGET_RE = re.compile(r"\$|dollar|budget|cost|price")
+_GROUP_RE = re.compile(r"we|us|group|family|friends")
+_SOLO_RE = re.compile(r"i |me |my |solo")
+# The whitespace-separated word following a standalone "to", "visit" or "go";
+# the lookahead keeps "go to Paris" yielding both "to" and "Paris"
+_DESTINATION_RE = re.compile(r"(?<!\S)(?ai:to|visit|go)(?=\s+(\S+))")
 
-@dataclass
+
+@dataclass(slots=True)
 class ConversationMessage:
     """Represents a single message in conversation history"""
     role: str  # 'user' or 'assistant'
@@ -17,27 +30,48 @@ class ConversationMessage:
     user_name: str
     chat_id: int
     metadata: Optional[Dict[str, Any]] = None
+    # Lowercased content, computed once for the keyword scans
+    content_lower: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.content_lower = self.content.lower()
 
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for serialization"""
-        data = asdict(self)
-        data['timestamp'] = self.timestamp.isoformat()
-        return data
+        """Convert to dictionary for serialization (metadata is not copied)"""
+        return {
+            'role': self.role,
+            'content': self.content,
+            'message_type': self.message_type,
+            'timestamp': self.timestamp.isoformat(),
+            'user_name': self.user_name,
+            'chat_id': self.chat_id,
+            'metadata': self.metadata,
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ConversationMessage':
         """Create from dictionary"""
-        data['timestamp'] = datetime.fromisoformat(data['timestamp'])
-        return cls(**data)
+        return cls(
+            role=data['role'],
+            content=data['content'],
+            message_type=data['message_type'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            user_name=data['user_name'],
+            chat_id=data['chat_id'],
+            metadata=data.get('metadata'),
+        )
 
 
 class ConversationMemory:
     """Manages conversation history for different chats"""
     
     def __init__(self, max_messages_per_chat: int = 20, max_age_hours: int = 24):
-        self.conversations: Dict[int, List[ConversationMessage]] = {}
+        # Bounded per chat, so the size cap evicts the oldest message on append
+        self.conversations: Dict[int, Deque[ConversationMessage]] = {}
         self.max_messages_per_chat = max_messages_per_chat
         self.max_age_hours = max_age_hours
+        # Open batch depth per chat; cleanup is deferred while a batch is open
+        self._batch_depth: Dict[int, int] = {}
         
     def add_user_message(
         self,
@@ -85,29 +119,45 @@ class ConversationMemory:
     def _add_message(self, chat_id: int, message: ConversationMessage) -> None:
         """Add message to conversation and manage history limits"""
         if chat_id not in self.conversations:
-            self.conversations[chat_id] = []
+            self.conversations[chat_id] = deque(maxlen=self.max_messages_per_chat)
         
         self.conversations[chat_id].append(message)
         
-        # Clean up old messages
-        self._cleanup_conversation(chat_id)
+        # Clean up old messages (once at batch exit when batching); this only
+        # checks the head of the deque unless something has expired
+        if chat_id not in self._batch_depth:
+            self._cleanup_conversation(chat_id, message.timestamp)
 
-    def _cleanup_conversation(self, chat_id: int) -> None:
+    @contextmanager
+    def batch(self, chat_id: int) -> Iterator["ConversationMemory"]:
+        """Group the writes of one request for a chat
+        
+        Messages are still appended immediately so reads inside the batch see them;
+        the age limit is enforced once when the outermost batch exits.
+        """
+        self._batch_depth[chat_id] = self._batch_depth.get(chat_id, 0) + 1
+        try:
+            yield self
+        finally:
+            depth = self._batch_depth[chat_id] - 1
+            if depth:
+                self._batch_depth[chat_id] = depth
+            else:
+                del self._batch_depth[chat_id]
+                self._cleanup_conversation(chat_id)
+
+    def _cleanup_conversation(self, chat_id: int, now: Optional[datetime] = None) -> None:
         """Remove old messages based on limits"""
         if chat_id not in self.conversations:
             return
             
         messages = self.conversations[chat_id]
         
-        # Remove messages older than max_age_hours
-        cutoff_time = datetime.now() - timedelta(hours=self.max_age_hours)
-        messages = [msg for msg in messages if msg.timestamp >= cutoff_time]
-        
-        # Keep only the most recent max_messages_per_chat messages
-        if len(messages) > self.max_messages_per_chat:
-            messages = messages[-self.max_messages_per_chat:]
-        
-        self.conversations[chat_id] = messages
+        # Remove messages older than max_age_hours; they are in append order,
+        # so the stale ones are all at the front
+        cutoff_time = (now or datetime.now()) - timedelta(hours=self.max_age_hours)
+        while messages and messages[0].timestamp < cutoff_time:
+            messages.popleft()
 
     def get_conversation_history(
         self,
@@ -120,10 +170,12 @@ class ConversationMemory:
         
         messages = self.conversations[chat_id]
         
-        if max_messages:
-            messages = messages[-max_messages:]
+        if max_messages and max_messages < len(messages):
+            recent = list(islice(reversed(messages), max_messages))
+            recent.reverse()
+            return recent
         
-        return messages
+        return list(messages)
 
     def get_recent_context(
         self,
@@ -131,13 +183,25 @@ class ConversationMemory:
         max_messages: int = 10
     ) -> str:
         """Get recent conversation context as formatted string"""
+        context_lines = self.get_recent_context_lines(chat_id, max_messages)
+        
+        if not context_lines:
+            return "No previous conversation history."
+        
+        return "\n".join(context_lines)
+
+    def get_recent_context_lines(
+        self,
+        chat_id: int,
+        max_messages: int = 10
+    ) -> List[str]:
+        """Get recent conversation context as formatted lines, empty if there is no history"""
         messages = self.get_conversation_history(chat_id, max_messages)
         
         if not messages:
-            return "No previous conversation history."
+            return []
         
-        context_lines = []
-        context_lines.append("Recent conversation history:")
+        context_lines = ["Recent conversation history:"]
         
         for msg in messages:
             timestamp_str = msg.timestamp.strftime("%H:%M")
@@ -157,7 +221,7 @@ class ConversationMemory:
                 content_preview = msg.content[:150] + ("..." if len(msg.content) > 150 else "")
                 context_lines.append(f"{timestamp_str} TravelBot: {content_preview}")
         
-        return "\n".join(context_lines)
+        return context_lines
 
     def get_travel_context_summary(self, chat_id: int) -> Dict[str, Any]:
         """Extract travel-related context from conversation history"""
@@ -175,7 +239,7 @@ class ConversationMemory:
         
         for msg in messages:
             if msg.role == "user":
-                content_lower = msg.content.lower()
+                content_lower = msg.content_lower
                 
                 # Count media shared
                 if msg.message_type == "photo":
@@ -185,24 +249,21 @@ class ConversationMemory:
                 
                 # Extract travel-related keywords (basic implementation)
                 # This could be enhanced with NLP libraries
-                if any(word in content_lower for word in ['visit', 'go to', 'trip to', 'travel to']):
+                if _TRAVEL_VERB_RE.search(content_lower):
                     # Basic destination extraction - could be improved
-                    words = msg.content.split()
-                    for i, word in enumerate(words):
-                        if word.lower() in ['to', 'visit', 'go']:
-                            if i + 1 < len(words):
-                                potential_destination = words[i + 1].strip('.,!?')
-                                if len(potential_destination) > 2:
-                                    context["destinations_mentioned"].add(potential_destination)
+                    for match in _DESTINATION_RE.finditer(msg.content):
+                        potential_destination = match.group(1).strip('.,!?')
+                        if len(potential_destination) > 2:
+                            context["destinations_mentioned"].add(potential_destination)
                 
                 # Extract budget mentions
-                if any(word in content_lower for word in ['$', 'dollar', 'budget', 'cost', 'price']):
+                if _BUDGET_RE.search(content_lower):
                     context["budget_mentions"].append(msg.content)
                 
                 # Extract group size mentions
-                if any(word in content_lower for word in ['we', 'us', 'group', 'family', 'friends']):
+                if _GROUP_RE.search(content_lower):
                     context["group_size"] = "group"
-                elif any(word in content_lower for word in ['i ', 'me ', 'my ', 'solo']):
+                elif _SOLO_RE.search(content_lower):
                     if context["group_size"] != "group":  # Don't overwrite group info
                         context["group_size"] = "solo"
         
@@ -275,7 +275,9 @@ class FollowUpQuestionService:
             travel_context_summary = ""
             
             if chat_id:
-                conversation_history = conversation_memory.get_recent_context(chat_id, max_messages=8)
+                conversation_history = "\n".join(
+                    conversation_memory.get_recent_context_lines(chat_id, max_messages=8)
+                )
                 travel_context = conversation_memory.get_travel_context_summary(chat_id)
                 travel_context_summary = self._format_travel_context_for_llm(travel_context)
             
@@ -390,7 +392,7 @@ If no questions are needed, return:
     def _build_follow_up_user_prompt(
         self,
         user_message: str,
-        bot_response: str,
+        bot_response: Optional[str],
         conversation_history: str,
         travel_context_summary: str,
         user_name: str,
@@ -405,11 +407,13 @@ Max questions: {max_questions}
 
 Latest Exchange:
 User said: "{user_message}"
-Bot responded: "{bot_response}"
-
 """
         
-        if conversation_history and conversation_history != "No previous conversation history.":
+        if bot_response:
+            prompt += f'Bot responded: "{bot_response}"\n'
+        prompt += "\n"
+        
+        if conversation_history:
             prompt += f"Recent Conversation Context:\n{conversation_history}\n\n"
         
         if travel_context_summary:
@@ -472,15 +476,19 @@ Return JSON with your analysis and questions."""
     async def generate_structured_follow_up_questions(
         self,
         user_message: str,
-        bot_response: str,
+        bot_response: Optional[str],
         context: Dict[str, Any],
         max_questions: int = 2
     ) -> List[Dict[str, Any]]:
-        """Generate structured follow-up questions for inline keyboards"""
+        """Generate structured follow-up questions for inline keyboards
+        
+        bot_response may be None when questions are generated concurrently
+        with the main response; callers then apply get_flight_option_questions.
+        """
         
         try:
             # Check if this is a flight response with options
-            if self._has_flight_options(bot_response):
+            if bot_response and self._has_flight_options(bot_response):
                 return self._generate_flight_option_buttons()
             
             chat_id = context.get("chat_id")
@@ -491,7 +499,9 @@ Return JSON with your analysis and questions."""
             travel_context_summary = ""
             
             if chat_id:
-                conversation_history = conversation_memory.get_recent_context(chat_id, max_messages=8)
+                conversation_history = "\n".join(
+                    conversation_memory.get_recent_context_lines(chat_id, max_messages=8)
+                )
                 travel_context = conversation_memory.get_travel_context_summary(chat_id)
                 travel_context_summary = self._format_travel_context_for_llm(travel_context)
             
@@ -536,6 +546,12 @@ Return JSON with your analysis and questions."""
             # Return empty list on error
             return []
     
+    def get_flight_option_questions(self, bot_response: str) -> List[Dict[str, Any]]:
+        """Return flight option buttons if the response offers flight options"""
+        if self._has_flight_options(bot_response):
+            return self._generate_flight_option_buttons()
+        return []
+    
     def _has_flight_options(self, bot_response: str) -> bool:
         """Check if bot response contains flight options (方案A, 方案B, 方案C)"""
         flight_keywords = ["方案A", "方案B", "方案C"]
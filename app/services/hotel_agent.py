@@ -316,15 +316,21 @@ class HotelAgent:
         
         return True
     
-    def build_recommendation_summary(self) -> str:
-        """Build summary of user requirements for hotel recommendation"""
+    def build_recommendation_summary(self, slots: Optional[Dict[str, Any]] = None) -> str:
+        """Build summary of user requirements for hotel recommendation
+        
+        Args:
+            slots: Slots to summarize; defaults to the agent's own slots
+        """
+        if slots is None:
+            slots = self.slots
         summary_parts = []
         
         # Basic info
-        if self.slots["party"]["adults"]:
-            adults = self.slots["party"]["adults"]
-            children = self.slots["party"]["children"]
-            rooms = self.slots["party"]["rooms"]
+        if slots["party"]["adults"]:
+            adults = slots["party"]["adults"]
+            children = slots["party"]["children"]
+            rooms = slots["party"]["rooms"]
             
             if children > 0:
                 summary_parts.append(f"{adults}成人{children}儿童")
@@ -335,20 +341,20 @@ class HotelAgent:
                 summary_parts.append(f"{rooms}间房")
         
         # Dates
-        if self.slots["check_in"] and self.slots["check_out"]:
-            summary_parts.append(f"{self.slots['check_in']}至{self.slots['check_out']}")
+        if slots["check_in"] and slots["check_out"]:
+            summary_parts.append(f"{slots['check_in']}至{slots['check_out']}")
         
         # City
-        if self.slots["city"]:
-            summary_parts.append(f"在{self.slots['city']}")
+        if slots["city"]:
+            summary_parts.append(f"在{slots['city']}")
         
         # Budget
-        if self.slots["budget_range_local"]:
-            summary_parts.append(f"预算{self.slots['budget_range_local']}/晚")
+        if slots["budget_range_local"]:
+            summary_parts.append(f"预算{slots['budget_range_local']}/晚")
         
         # Star level
-        if self.slots["star_level"]:
-            summary_parts.append(f"{self.slots['star_level']}星")
+        if slots["star_level"]:
+            summary_parts.append(f"{slots['star_level']}星")
         
         return "，".join(summary_parts)
     
@@ -7,6 +7,7 @@ import logging
 from datetime import date, timedelta
 from typing import Dict, Any, Optional
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from app.models.hotel_slots import HotelSlots
 
 logger = logging.getLogger(__name__)
 
@@ -124,21 +125,21 @@ class HotelUIService:
         ]
         return InlineKeyboardMarkup(keyboard)
     
-    def get_summary_text(self, slots: Dict[str, Any]) -> str:
+    def get_summary_text(self, slots: HotelSlots) -> str:
         """生成信息摘要文本"""
-        party = slots.get("party", {"adults": 2, "children": 0, "rooms": 1})
+        party = slots.party
         
         text = "📌 当前酒店预订信息：\n\n"
-        text += f"🏙 目的地：{slots.get('city', '未设置')}\n"
-        text += f"📅 入住：{slots.get('check_in', '未设置')}\n"
-        text += f"🛏 住几晚：{slots.get('nights', '未设置')}\n"
-        text += f"📅 退房：{slots.get('check_out', '未设置')}\n"
-        text += f"💰 预算/晚：{slots.get('budget_range_local', '未设置')}\n"
-        text += f"👪 人数：成人{party.get('adults', 2)} 儿童{party.get('children', 0)} 房间{party.get('rooms', 1)}\n"
+        text += f"🏙 目的地：{slots.city}\n"
+        text += f"📅 入住：{slots.check_in}\n"
+        text += f"🛏 住几晚：{slots.nights}\n"
+        text += f"📅 退房：{slots.check_out}\n"
+        text += f"💰 预算/晚：{slots.budget_range_local}\n"
+        text += f"👪 人数：成人{party.adults} 儿童{party.children} 房间{party.rooms}\n"
         
         return text
     
-    def get_initial_message(self, slots: Dict[str, Any]) -> str:
+    def get_initial_message(self, slots: HotelSlots) -> str:
         """获取初始消息文本"""
         return (
             "🏨 **酒店推荐助手**\n\n"
@@ -169,7 +170,7 @@ class HotelUIService:
             "请直接发送预算信息："
         )
     
-    def get_completion_message(self, slots: Dict[str, Any]) -> str:
+    def get_completion_message(self, slots: HotelSlots) -> str:
         """获取完成收集信息后的消息"""
         return (
             "✅ **信息收集完成！**\n\n"
@@ -177,7 +178,7 @@ class HotelUIService:
             "\n\n正在为您搜索最合适的酒店推荐..."
         )
     
-    def update_slots_from_callback(self, slots: Dict[str, Any], callback_data: str) -> bool:
+    def update_slots_from_callback(self, slots: HotelSlots, callback_data: str) -> bool:
         """根据回调数据更新slots，返回是否成功更新"""
         try:
             if callback_data.startswith("hotel_ui:set_ci:"):
@@ -185,14 +186,14 @@ class HotelUIService:
                 try:
                     check_in = callback_data.split(":", 2)[2]
                     logger.info(f"Setting check_in date: {check_in}")
-                    slots["check_in"] = check_in
+                    slots.check_in = check_in
                     
                     # 如果已设置晚数，自动计算退房日期
-                    if slots.get("nights"):
+                    if slots.nights:
                         ci_date = date.fromisoformat(check_in)
-                        co_date = ci_date + timedelta(days=int(slots["nights"]))
-                        slots["check_out"] = co_date.isoformat()
-                        logger.info(f"Calculated check_out date: {slots['check_out']}")
+                        co_date = ci_date + timedelta(days=int(slots.nights))
+                        slots.check_out = co_date.isoformat()
+                        logger.info(f"Calculated check_out date: {slots.check_out}")
                     
                     return True
                 except Exception as e:
@@ -202,20 +203,20 @@ class HotelUIService:
             elif callback_data.startswith("hotel_ui:set_nights:"):
                 # 设置住宿晚数
                 nights = int(callback_data.split(":", 2)[2])
-                slots["nights"] = nights
+                slots.nights = nights
                 
                 # 如果已设置入住日期，自动计算退房日期
-                if slots.get("check_in"):
-                    ci_date = date.fromisoformat(slots["check_in"])
+                if slots.check_in:
+                    ci_date = date.fromisoformat(slots.check_in)
                     co_date = ci_date + timedelta(days=nights)
-                    slots["check_out"] = co_date.isoformat()
+                    slots.check_out = co_date.isoformat()
                 
                 return True
                 
             elif callback_data.startswith("hotel_ui:set_budget:"):
                 # 设置预算
                 budget = callback_data.split(":", 2)[2]
-                slots["budget_range_local"] = budget
+                slots.budget_range_local = budget
                 return True
                 
             elif callback_data.startswith(("hotel_ui:adult:", "hotel_ui:child:", "hotel_ui:room:")):
@@ -224,18 +225,15 @@ class HotelUIService:
                 kind = parts[1]
                 operation = parts[2]
                 
-                if "party" not in slots:
-                    slots["party"] = {"adults": 2, "children": 0, "rooms": 1}
+                party = slots.party
+                step = 1 if operation == "+" else -1
                 
                 if kind == "adult":
-                    current = slots["party"]["adults"]
-                    slots["party"]["adults"] = max(1, current + (1 if operation == "+" else -1))
+                    party.adults = max(1, party.adults + step)
                 elif kind == "child":
-                    current = slots["party"]["children"]
-                    slots["party"]["children"] = max(0, current + (1 if operation == "+" else -1))
+                    party.children = max(0, party.children + step)
                 elif kind == "room":
-                    current = slots["party"]["rooms"]
-                    slots["party"]["rooms"] = max(1, current + (1 if operation == "+" else -1))
+                    party.rooms = max(1, party.rooms + step)
                 
                 return True
                 
@@ -245,16 +243,16 @@ class HotelUIService:
         
         return False
     
-    def update_slots_from_text(self, slots: Dict[str, Any], text: str, awaiting: str) -> bool:
+    def update_slots_from_text(self, slots: HotelSlots, text: str, awaiting: str) -> bool:
         """根据文本输入更新slots，返回是否成功更新"""
         try:
             if awaiting == "city":
-                slots["city"] = text.strip()
+                slots.city = text.strip()
                 return True
             elif awaiting == "budget":
                 # 清理货币符号
                 budget_text = text.strip().replace("¥", "").replace("$", "").replace("€", "").replace("£", "")
-                slots["budget_range_local"] = budget_text
+                slots.budget_range_local = budget_text
                 return True
         except Exception as e:
             logger.error(f"Error updating slots from text {text}: {e}")
@@ -5,7 +5,7 @@
 
 import logging
 from datetime import date, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 logger = logging.getLogger(__name__)
@@ -21,37 +21,43 @@ class HotelUIV2:
             "EUR": "€",
             "GBP": "£"
         }
+        # 不依赖用户状态的键盘构建函数，构建一次后复用（InlineKeyboardMarkup 不可变）
+        self._static_keyboard_builders = {
+            "main_menu": self._get_main_menu_keyboard,
+            "essential_info": self._get_essential_info_keyboard,
+            "first_recommendation": self._get_first_recommendation_keyboard,
+            "conditional_recommendation": self._get_conditional_recommendation_keyboard,
+            "priced_recommendation": self._get_priced_recommendation_keyboard,
+            "children_confirmation": self._get_children_confirmation_keyboard,
+            "city_selection": self._get_city_selection_keyboard,
+            "budget_selection": self._get_budget_selection_keyboard,
+            "location_selection": self._get_location_selection_keyboard,
+            "tags_selection": self._get_tags_selection_keyboard,
+            "party_selection": self._get_party_selection_keyboard,  # 默认人数
+            "extras_selection": self._get_extras_selection_keyboard,
+        }
+        self._keyboard_cache: Dict[str, InlineKeyboardMarkup] = {}
+        # 日期键盘随日期变化，按当天缓存
+        self._date_keyboard: Tuple[Optional[date], Optional[InlineKeyboardMarkup]] = (None, None)
     
     def get_keyboard(self, keyboard_type: str, slots: Dict[str, Any] = None) -> InlineKeyboardMarkup:
-        """根据类型获取键盘"""
-        if keyboard_type == "main_menu":
-            return self._get_main_menu_keyboard()
-        elif keyboard_type == "essential_info":
-            return self._get_essential_info_keyboard()
-        elif keyboard_type == "first_recommendation":
-            return self._get_first_recommendation_keyboard()
-        elif keyboard_type == "conditional_recommendation":
-            return self._get_conditional_recommendation_keyboard()
-        elif keyboard_type == "priced_recommendation":
-            return self._get_priced_recommendation_keyboard()
-        elif keyboard_type == "children_confirmation":
-            return self._get_children_confirmation_keyboard()
-        elif keyboard_type == "city_selection":
-            return self._get_city_selection_keyboard()
-        elif keyboard_type == "budget_selection":
-            return self._get_budget_selection_keyboard()
-        elif keyboard_type == "location_selection":
-            return self._get_location_selection_keyboard()
-        elif keyboard_type == "tags_selection":
-            return self._get_tags_selection_keyboard()
-        elif keyboard_type == "date_selection":
-            return self._get_date_selection_keyboard()
-        elif keyboard_type == "party_selection":
+        """根据类型获取键盘（静态键盘只构建一次）"""
+        if keyboard_type == "party_selection" and slots:
             return self._get_party_selection_keyboard(slots)
-        elif keyboard_type == "extras_selection":
-            return self._get_extras_selection_keyboard()
-        else:
-            return self._get_main_menu_keyboard()
+        if keyboard_type == "date_selection":
+            today = date.today()
+            cached_day, keyboard = self._date_keyboard
+            if cached_day != today:
+                keyboard = self._get_date_selection_keyboard()
+                self._date_keyboard = (today, keyboard)
+            return keyboard
+        if keyboard_type not in self._static_keyboard_builders:
+            keyboard_type = "main_menu"
+        keyboard = self._keyboard_cache.get(keyboard_type)
+        if keyboard is None:
+            keyboard = self._static_keyboard_builders[keyboard_type]()
+            self._keyboard_cache[keyboard_type] = keyboard
+        return keyboard
     
     def _get_main_menu_keyboard(self) -> InlineKeyboardMarkup:
         """主菜单键盘"""
@@ -1,6 +1,8 @@
 import logging
 import json
-from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Mapping
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from enum import Enum
 
@@ -271,7 +273,13 @@ class InlineKeyboardService:
         """Create custom buttons for specific actions"""
         
         if not button_types:
-            button_types = ["quick_flight", "book_hotel", "weather"]
+            button_types = ("quick_flight", "book_hotel", "weather")
+        
+        return self._create_custom_buttons(chat_id, tuple(button_types))
+    
+    @lru_cache(maxsize=1024)
+    def _create_custom_buttons(self, chat_id: int, button_types: Tuple[str, ...]) -> Optional[InlineKeyboardMarkup]:
+        """Build custom buttons (cached, the markup is immutable and only varies by chat)"""
         
         keyboard = []
         
@@ -333,28 +341,29 @@ class InlineKeyboardService:
         
         return callback_str
     
-    def parse_callback_data(self, callback_data: str) -> Dict[str, str]:
-        """Parse callback data back to dict"""
+    @lru_cache(maxsize=4096)
+    def parse_callback_data(self, callback_data: str) -> Mapping[str, str]:
+        """Parse callback data back to a read-only mapping (cached, buttons repeat)"""
         try:
             # Try JSON format first
             if callback_data.startswith('{'):
                 data = json.loads(callback_data)
-                return {
+                return MappingProxyType({
                     "action": data.get("a", ""),
                     "value": data.get("v", ""),
                     "chat_id": str(data.get("c", ""))
-                }
+                })
             else:
                 # Fallback to colon-separated format
                 parts = callback_data.split(':')
-                return {
+                return MappingProxyType({
                     "action": parts[0] if len(parts) > 0 else "",
                     "value": parts[1] if len(parts) > 1 else "",
                     "chat_id": parts[2] if len(parts) > 2 else ""
-                }
+                })
         except Exception as e:
             logger.error(f"Error parsing callback data: {e}")
-            return {"action": "", "value": "", "chat_id": ""}
+            return MappingProxyType({"action": "", "value": "", "chat_id": ""})
     
     def create_quick_action_keyboard(self, chat_id: int) -> InlineKeyboardMarkup:
         """Create quick action keyboard for common travel questions"""
@@ -376,6 +385,7 @@ class InlineKeyboardService:
         
         return InlineKeyboardMarkup(keyboard)
     
+    @lru_cache(maxsize=1024)
     def format_user_answer(self, action: str, value: str) -> str:
         """Format user's button selection as natural text"""
         
@@ -1,15 +1,21 @@
+import asyncio
 import logging
 import base64
+import hashlib
 import io
 import json
 import uuid
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 import re
+import time
+from collections import OrderedDict
 from datetime import datetime
 from openai import AsyncOpenAI
 from telegram import Bot, PhotoSize
 from app.config.settings import settings
 from app.services.conversation_memory import conversation_memory
+from app.prompts.travel import get_hotel_prompt
+from app.prompts.versions import prompt_version
 from app.models.travel_plan import TravelPlan, TravelType, BudgetLevel, ActivityType
 from app.services.plan_storage import plan_storage
 from app.services.follow_up_questions import follow_up_service
@@ -21,6 +27,55 @@ from search.google_search import search_web
 
 logger = logging.getLogger(__name__)
 
+# Per-chat cache of generated text responses, keyed by normalized message text
+# and a fingerprint of the latest assistant message
+_RESPONSE_CACHE_TTL_SECONDS = 600
+_RESPONSE_CACHE_MAX_ENTRIES = 512
+
+# Real-time hotel info fetches shared across chats, keyed by (destination, check_in, check_out)
+_HOTEL_INFO_CACHE_TTL_SECONDS = 300
+_HOTEL_INFO_CACHE_MAX_ENTRIES = 256
+
+# Hotel-specific images for different destinations
+_HOTEL_MEDIA_URLS = {
+    "tokyo": {
+        "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Tokyo hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    },
+    "paris": {
+        "photo": "https://images.unsplash.com/photo-1564501049412-61c2a3083791?w=800",  # Paris hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    },
+    "new_york": {
+        "photo": "https://images.unsplash.com/photo-1571896349842-33c89424de2d?w=800",  # NYC hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    },
+    "london": {
+        "photo": "https://images.unsplash.com/photo-1582719478250-c89cae4dc85b?w=800",  # London hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    },
+    "osaka": {
+        "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Osaka hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    },
+    "kyoto": {
+        "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Kyoto hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    },
+    "seoul": {
+        "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Seoul hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    },
+    "singapore": {
+        "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Singapore hotel
+        "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+    }
+}
+_DEFAULT_HOTEL_MEDIA = {
+    "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Default hotel image
+    "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
+}
+
 
 class LLMService:
     def __init__(self):
@@ -29,6 +84,11 @@ class LLMService:
         self.vision_model = "gpt-4o-mini"  # Vision-capable model
         self.max_tokens = settings.openai_max_tokens
         self.temperature = settings.openai_temperature
+        self._response_cache: OrderedDict = OrderedDict()
+        # Outstanding response requests, keyed like the response cache
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        # (started_at, fetch task) per hotel info key; concurrent callers share the task
+        self._hotel_info_cache: OrderedDict = OrderedDict()
         
         # Initialize hotel agent with dependencies
         hotel_agent.set_dependencies(city_classifier, self)
@@ -92,33 +152,173 @@ class LLMService:
         self,
         message: str,
         context: Dict[str, Any],
-        message_type: str = "text"
+        message_type: str = "text",
+        use_cache: bool = True
     ) -> str:
-        """Generate travel response WITHOUT follow-up questions (for inline keyboard approach)"""
+        """Generate travel response WITHOUT follow-up questions (for inline keyboard approach)
+        
+        Pass use_cache=False for fixed prompts whose answer depends on state
+        outside the conversation text, such as a flight option selection.
+        """
+        chat_id = context.get("chat_id")
+        
+        # Repeated questions in the same chat reuse the recent or in-flight answer
+        cache_key = self._response_cache_key(chat_id, message, message_type) if use_cache else None
+        reused_response = await self._reuse_response(cache_key, chat_id, message)
+        if reused_response is not None:
+            return reused_response
+        
+        inflight = self._begin_inflight(cache_key)
+        generated_response = None
         try:
-            chat_id = context.get("chat_id")
+            messages = await self._build_travel_messages_without_followup(
+                message, context, message_type
+            )
             
-            # Check if this is a flight query and try to get real-time data
-            flight_data = await self._get_flight_data_if_applicable(message, context)
+            # Hotel queries are now handled by the UI interface in message handlers
+            # No need to check for hotel queries here anymore
             
-            # Build system prompt for travel planning
-            system_prompt = self._build_system_prompt(context, message_type)
+            logger.info(f"Generating LLM response without follow-up for {message_type} message: {message[:50]}...")
             
-            # Add flight data to context if available
-            if flight_data:
-                system_prompt += f"\n\nReal-time flight data available:\n{flight_data}"
-                
-            # Check if this is a flight query without dates
-            flight_keywords = ["航班", "机票", "飞机", "flight", "airline", "airport"]
-            date_patterns = ["10月", "11月", "12月", "1月", "2月", "3月", "4月", "5月", "6月", "7月", "8月", "9月", "号", "日", "月"]
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            )
             
-            message_lower = message.lower()
-            has_flight_keywords = any(keyword in message_lower for keyword in flight_keywords)
-            has_dates = any(pattern in message for pattern in date_patterns)
+            generated_response = response.choices[0].message.content.strip()
             
-            if has_flight_keywords and not has_dates:
-                # Flight query without dates - ask for dates first
-                system_prompt += """
+            # Skip formatting for flight responses to preserve plain text format
+            # if any(keyword in generated_response for keyword in ["方案A", "方案B", "方案C"]):
+            #     try:
+            #         formatted = self._format_flight_options_response(
+            #             generated_response,
+            #             user_message=message,
+            #             context=context
+            #         )
+            #         if formatted:
+            #             generated_response = formatted
+            #     except Exception as _:
+            #         # Fall back to original text on any formatting error
+            #         pass
+            logger.info("Successfully generated LLM response without follow-up")
+            logger.info(f"Raw LLM response: {generated_response[:500]}...")
+            
+            # Store assistant response in conversation memory
+            if chat_id:
+                conversation_memory.add_assistant_message(
+                    chat_id=chat_id,
+                    content=generated_response,
+                    message_type="text"
+                )
+            
+            self._store_cached_response(cache_key, generated_response)
+            return generated_response
+            
+        except Exception as e:
+            logger.error(f"Error generating LLM response: {e}")
+            return self._get_fallback_response(message_type, context)
+        finally:
+            self._end_inflight(cache_key, inflight, generated_response)
+
+    async def stream_travel_response_without_followup(
+        self,
+        message: str,
+        context: Dict[str, Any],
+        message_type: str = "text"
+    ) -> AsyncIterator[str]:
+        """Stream a travel response WITHOUT follow-up questions as text deltas
+        
+        Mirrors generate_travel_response_without_followup: cached or in-flight
+        answers are yielded whole, and the completed response is stored in
+        conversation memory and the response cache once the stream finishes.
+        A failure before any text yields the fallback response; a failure after
+        partial text is re-raised so the caller doesn't treat it as complete.
+        """
+        chat_id = context.get("chat_id")
+        
+        # Repeated questions in the same chat reuse the recent or in-flight answer
+        cache_key = self._response_cache_key(chat_id, message, message_type)
+        reused_response = await self._reuse_response(cache_key, chat_id, message)
+        if reused_response is not None:
+            yield reused_response
+            return
+        
+        inflight = self._begin_inflight(cache_key)
+        generated_response = None
+        parts: List[str] = []
+        try:
+            messages = await self._build_travel_messages_without_followup(
+                message, context, message_type
+            )
+            
+            logger.info(f"Streaming LLM response without follow-up for {message_type} message: {message[:50]}...")
+            
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            generated_response = "".join(parts).strip()
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {e}")
+            if parts:
+                raise
+            yield self._get_fallback_response(message_type, context)
+            return
+        finally:
+            self._end_inflight(cache_key, inflight, generated_response)
+        
+        logger.info("Successfully streamed LLM response without follow-up")
+        
+        # Store assistant response in conversation memory
+        if chat_id:
+            conversation_memory.add_assistant_message(
+                chat_id=chat_id,
+                content=generated_response,
+                message_type="text"
+            )
+        
+        self._store_cached_response(cache_key, generated_response)
+
+    async def _build_travel_messages_without_followup(
+        self,
+        message: str,
+        context: Dict[str, Any],
+        message_type: str
+    ) -> List[Dict[str, Any]]:
+        """Build the OpenAI messages for a travel response, including flight guidance"""
+        # Check if this is a flight query and try to get real-time data
+        flight_data = await self._get_flight_data_if_applicable(message, context)
+        
+        # Build system prompt for travel planning
+        system_prompt = self._build_system_prompt(context, message_type)
+        
+        # Add flight data to context if available
+        if flight_data:
+            system_prompt += f"\n\nReal-time flight data available:\n{flight_data}"
+            
+        # Check if this is a flight query without dates
+        flight_keywords = ["航班", "机票", "飞机", "flight", "airline", "airport"]
+        date_patterns = ["10月", "11月", "12月", "1月", "2月", "3月", "4月", "5月", "6月", "7月", "8月", "9月", "号", "日", "月"]
+        
+        message_lower = message.lower()
+        has_flight_keywords = any(keyword in message_lower for keyword in flight_keywords)
+        has_dates = any(pattern in message for pattern in date_patterns)
+        
+        if has_flight_keywords and not has_dates:
+            # Flight query without dates - ask for dates first
+            system_prompt += """
 
 IMPORTANT: The user is asking about flights but hasn't provided specific dates. You should ask for the travel dates first before providing flight options.
 
@@ -132,9 +332,9 @@ Please let me know:
 For example: "I'd like to depart on October 1st and return on October 5th" or "I need a one-way ticket for October 1st"
 
 Once you provide the dates, I'll search for the best flight options for you!"""
-            elif has_flight_keywords and has_dates:
-                # Flight query with dates - provide flight options
-                system_prompt += """
+        elif has_flight_keywords and has_dates:
+            # Flight query with dates - provide flight options
+            system_prompt += """
 
 CRITICAL: You are a flight information assistant. You MUST respond using EXACTLY this format. NO EMOJIS, NO DEVIATIONS, NO EXCEPTIONS.
 
@@ -182,53 +382,100 @@ EXAMPLE: 方案A｜中国东方航空：直飞，方便快捷
 
 IMPORTANT: Always end your response with a booking link:
 [在网页中选择和预订航班方案](https://www.skyscanner.com)"""
-            
-            # Build conversation messages with history
-            messages = self._build_conversation_messages(message, context, message_type, system_prompt)
-            
-            # Hotel queries are now handled by the UI interface in message handlers
-            # No need to check for hotel queries here anymore
-            
-            logger.info(f"Generating LLM response without follow-up for {message_type} message: {message[:50]}...")
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
-            )
-            
-            generated_response = response.choices[0].message.content.strip()
-            
-            # Skip formatting for flight responses to preserve plain text format
-            # if any(keyword in generated_response for keyword in ["方案A", "方案B", "方案C"]):
-            #     try:
-            #         formatted = self._format_flight_options_response(
-            #             generated_response,
-            #             user_message=message,
-            #             context=context
-            #         )
-            #         if formatted:
-            #             generated_response = formatted
-            #     except Exception as _:
-            #         # Fall back to original text on any formatting error
-            #         pass
-            logger.info("Successfully generated LLM response without follow-up")
-            logger.info(f"Raw LLM response: {generated_response[:500]}...")
-            
-            # Store assistant response in conversation memory
-            if chat_id:
-                conversation_memory.add_assistant_message(
-                    chat_id=chat_id,
-                    content=generated_response,
-                    message_type="text"
-                )
-            
-            return generated_response
-            
-        except Exception as e:
-            logger.error(f"Error generating LLM response: {e}")
-            return self._get_fallback_response(message_type, context)
+        
+        # Build conversation messages with history
+        return self._build_conversation_messages(message, context, message_type, system_prompt)
+
+    async def _reuse_response(self, key: Optional[tuple], chat_id: Optional[int], message: str) -> Optional[str]:
+        """Return a cached or in-flight response for key
+        
+        A cached answer is recorded in conversation memory as this turn's reply;
+        a joined in-flight answer is recorded once, by the request producing it.
+        """
+        response = self._get_cached_response(key)
+        if response is None and key in self._inflight:
+            # Same question already being answered for this chat in the same
+            # conversation state; wait for it instead of a duplicate LLM request
+            logger.info(f"Joining in-flight LLM request for: {message[:50]}...")
+            return await asyncio.shield(self._inflight[key])
+        if response is None:
+            return None
+        
+        logger.info(f"Reusing LLM response for: {message[:50]}...")
+        conversation_memory.add_assistant_message(
+            chat_id=chat_id,
+            content=response,
+            message_type="text"
+        )
+        return response
+
+    def _begin_inflight(self, key: Optional[tuple]) -> Optional[asyncio.Future]:
+        """Register an in-flight request so duplicates can await its result"""
+        if key is None:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    def _end_inflight(self, key: Optional[tuple], future: Optional[asyncio.Future], response: Optional[str]) -> None:
+        """Publish the result (None on failure) to waiters and unregister the request"""
+        if future is None:
+            return
+        if not future.done():
+            future.set_result(response)
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def _response_cache_key(self, chat_id: Optional[int], message: str, message_type: str) -> Optional[tuple]:
+        """Build the response cache key, or None if the message is not cacheable"""
+        if not chat_id or message_type != "text":
+            return None
+        # Case and whitespace differences don't change the question
+        normalized = " ".join(message.casefold().split())
+        if not normalized:
+            return None
+        # The same words mean something else after a different answer ("yes",
+        # picking plan A), so the key includes the conversation state
+        return (chat_id, normalized, self._conversation_fingerprint(chat_id))
+
+    def _conversation_fingerprint(self, chat_id: int) -> str:
+        """Short hash of the chat's latest assistant message ("" if there is none)"""
+        for msg in reversed(conversation_memory.get_conversation_history(chat_id)):
+            if msg.role == "assistant":
+                return self._response_fingerprint(msg.content)
+        return ""
+
+    @staticmethod
+    def _response_fingerprint(response: str) -> str:
+        return hashlib.blake2b(response.encode(), digest_size=8).hexdigest()
+
+    def _get_cached_response(self, key: Optional[tuple]) -> Optional[str]:
+        """Return a cached response that has not expired yet"""
+        if key is None:
+            return None
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > _RESPONSE_CACHE_TTL_SECONDS:
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        return response
+
+    def _store_cached_response(self, key: Optional[tuple], response: str) -> None:
+        """Store a response, evicting the least recently used entries"""
+        if key is None or not response:
+            return
+        # Once this answer is the latest assistant message, asking the same
+        # question again computes a key with its fingerprint; store it there too
+        chat_id, normalized, _ = key
+        entry = (time.monotonic(), response)
+        for cache_key in (key, (chat_id, normalized, self._response_fingerprint(response))):
+            self._response_cache[cache_key] = entry
+            self._response_cache.move_to_end(cache_key)
+        while len(self._response_cache) > _RESPONSE_CACHE_MAX_ENTRIES:
+            self._response_cache.popitem(last=False)
 
     def _format_flight_options_response(self, text: str, user_message: Optional[str] = None, context: Optional[Dict[str, Any]] = None) -> str:
         """Beautify LLM flight ABC options text with emojis and clear line breaks.
@@ -1094,17 +1341,29 @@ IMPORTANT: Always end your response with a booking link:
             logger.error(f"Error in hotel recommendation: {e}")
             return "抱歉，处理您的酒店推荐请求时出现了问题。请稍后再试。"
     
-    async def _generate_hotel_recommendations(self, context: Dict[str, Any]) -> str:
-        """Generate hotel recommendations based on filled slots"""
+    async def _generate_hotel_recommendations(
+        self,
+        context: Dict[str, Any],
+        slots: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Generate hotel recommendations based on filled slots
+        
+        Args:
+            context: Conversation context
+            slots: Hotel slots to use instead of the shared hotel_agent.slots
+        """
         try:
             logger.info("Starting hotel recommendations generation")
             
             # Build system prompt for hotel recommendations
             system_prompt = self._build_hotel_system_prompt()
-            logger.info(f"System prompt length: {len(system_prompt)}")
+            logger.info(
+                f"System prompt length: {len(system_prompt)}, "
+                f"version: {prompt_version(system_prompt)}"
+            )
             
             # Build user prompt with slot information
-            user_prompt = self._build_hotel_user_prompt()
+            user_prompt = self._build_hotel_user_prompt(slots)
             logger.info(f"User prompt: {user_prompt}")
             
             # Call OpenAI for hotel recommendations
@@ -1133,34 +1392,15 @@ IMPORTANT: Always end your response with a booking link:
     
     def _build_hotel_system_prompt(self) -> str:
         """Build system prompt for hotel recommendations"""
-        return """
-You are "waypal – Hotel Planner". 
-Your duty is to recommend hotels based on user requirements.
-
-CRITICAL: Hotel Selection Priority
-1. **NEWLY OPENED HOTELS (2022-2025)**: Prioritize hotels that opened in the last 3 years, especially those with social media buzz
-2. **INSTAGRAM-WORTHY/TRENDY HOTELS**: Focus on hotels popular on social media (Xiaohongshu, Instagram, TikTok) for photo opportunities
-3. **DESIGN-FOCUSED HOTELS**: Prefer hotels with unique architecture, modern design, or distinctive features
-4. **FALLBACK**: If no recent openings available, clearly state "暂无近期开业的网红酒店，以下为知名度高的替代选项" and recommend well-known hotels
-
-Output format for each hotel (exact lines):
-- **Hotel Name (local + English if available)** (CRITICAL: Always wrap hotel names in **bold** markdown - MANDATORY FORMAT)
-- TripAdvisor Rating: [rating]/5 (if unknown: Not available)
-- Price Range: [local currency per night]
-- Highlights: [comma-separated reasons—location/transport/view/breakfast/family/amenities]
-
-Guardrails:
-- Do NOT invent ratings/prices/opening year. If unknown: "Not available".
-- Always use local currency and realistic per-night ranges.
-- MANDATORY: Every hotel name MUST be wrapped in **bold** markdown format - this is non-negotiable.
-"""
+        return get_hotel_prompt("recommendation")
     
-    def _build_hotel_user_prompt(self) -> str:
+    def _build_hotel_user_prompt(self, slots: Optional[Dict[str, Any]] = None) -> str:
         """Build user prompt with slot information"""
-        slots = hotel_agent.slots
+        if slots is None:
+            slots = hotel_agent.slots
         logger.info(f"Building hotel user prompt with slots: {slots}")
         
-        summary = hotel_agent.build_recommendation_summary()
+        summary = hotel_agent.build_recommendation_summary(slots)
         logger.info(f"Hotel recommendation summary: {summary}")
         
         prompt = f"用户需求：{summary}\n\n"
@@ -1434,10 +1674,31 @@ Provide personalized travel recommendations."""
             # Download the photo
             photo_file = await bot.get_file(photo.file_id)
             photo_bytes = await photo_file.download_as_bytearray()
-            
-            # Convert to base64 for OpenAI
-            photo_base64 = base64.b64encode(photo_bytes).decode('utf-8')
-            
+        except Exception as e:
+            logger.error(f"Error downloading photo: {e}")
+            return self._get_fallback_response("photo", context)
+        
+        return await self.analyze_photo_bytes(photo_bytes, caption, context)
+
+    async def analyze_photo_bytes(
+        self,
+        photo_bytes: bytes,
+        caption: str,
+        context: Dict[str, Any]
+    ) -> str:
+        """Analyze already downloaded photo bytes using OpenAI Vision"""
+        # Convert to base64 for OpenAI
+        photo_base64 = base64.b64encode(photo_bytes).decode('utf-8')
+        return await self.analyze_photo_base64(photo_base64, caption, context)
+
+    async def analyze_photo_base64(
+        self,
+        photo_base64: str,
+        caption: str,
+        context: Dict[str, Any]
+    ) -> str:
+        """Analyze a base64-encoded photo using OpenAI Vision"""
+        try:
             # Build system prompt for photo analysis
             system_prompt = self._build_photo_analysis_prompt(context)
             
@@ -1536,10 +1797,18 @@ Key guidelines:
         context: Dict[str, Any]
     ) -> str:
         """Analyze image document using OpenAI Vision"""
+        # Convert to base64 for OpenAI
+        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        return await self.analyze_document_image_base64(image_base64, filename, context)
+
+    async def analyze_document_image_base64(
+        self,
+        image_base64: str,
+        filename: str,
+        context: Dict[str, Any]
+    ) -> str:
+        """Analyze a base64-encoded image document using OpenAI Vision"""
         try:
-            # Convert to base64 for OpenAI
-            image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-            
             # Build system prompt for document analysis
             system_prompt = self._build_document_analysis_prompt(context, filename)
             
@@ -1664,7 +1933,10 @@ Generate a warm, welcoming message for a new user. Keep it concise (2-3 sentence
             
             # Get conversation context for better planning
             travel_context = conversation_memory.get_travel_context_summary(chat_id) if chat_id else {}
-            conversation_history = conversation_memory.get_recent_context(chat_id, max_messages=15) if chat_id else ""
+            conversation_history = (
+                "\n".join(conversation_memory.get_recent_context_lines(chat_id, max_messages=15))
+                if chat_id else ""
+            )
             
             # Build system prompt for structured plan generation
             system_prompt = self._build_plan_generation_prompt()
@@ -1815,7 +2087,7 @@ Guidelines:
             prompt += "\n"
         
         # Add recent conversation for context
-        if conversation_history and conversation_history != "No previous conversation history.":
+        if conversation_history:
             prompt += f"Recent Conversation:\n{conversation_history}\n\n"
         
         # Add specific requirements based on chat type
@@ -2124,51 +2396,12 @@ Guidelines:
             destination: Destination name (e.g., "Tokyo", "Paris")
         
         Returns:
-            dict: Dictionary with hotel media URLs
+            dict: Dictionary with hotel media URLs (shared, do not mutate)
         """
-        # Hotel-specific images for different destinations
-        hotel_media_urls = {
-            "tokyo": {
-                "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Tokyo hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            },
-            "paris": {
-                "photo": "https://images.unsplash.com/photo-1564501049412-61c2a3083791?w=800",  # Paris hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            },
-            "new_york": {
-                "photo": "https://images.unsplash.com/photo-1571896349842-33c89424de2d?w=800",  # NYC hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            },
-            "london": {
-                "photo": "https://images.unsplash.com/photo-1582719478250-c89cae4dc85b?w=800",  # London hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            },
-            "osaka": {
-                "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Osaka hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            },
-            "kyoto": {
-                "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Kyoto hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            },
-            "seoul": {
-                "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Seoul hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            },
-            "singapore": {
-                "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Singapore hotel
-                "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-            }
-        }
-        
         # Normalize destination name
         dest_key = destination.lower().replace(" ", "_").replace("市", "").replace("市", "")
         
-        return hotel_media_urls.get(dest_key, {
-            "photo": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800",  # Default hotel image
-            "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4"
-        })
+        return _HOTEL_MEDIA_URLS.get(dest_key, _DEFAULT_HOTEL_MEDIA)
 
     async def get_realtime_travel_info(self, destination: str, info_type: str = "general") -> Optional[str]:
         """
@@ -2240,6 +2473,31 @@ Guidelines:
         Returns:
             Formatted hotel information string or None if failed
         """
+        key = (destination, check_in, check_out)
+        entry = self._hotel_info_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= _HOTEL_INFO_CACHE_TTL_SECONDS:
+            self._hotel_info_cache.move_to_end(key)
+            task = entry[1]
+        else:
+            task = asyncio.create_task(self._fetch_realtime_hotel_info(destination, check_in, check_out))
+            self._hotel_info_cache[key] = (time.monotonic(), task)
+            self._hotel_info_cache.move_to_end(key)
+            while len(self._hotel_info_cache) > _HOTEL_INFO_CACHE_MAX_ENTRIES:
+                self._hotel_info_cache.popitem(last=False)
+            task.add_done_callback(lambda done: self._forget_failed_hotel_info(key, done))
+        # Shielded so one caller giving up doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def _forget_failed_hotel_info(self, key: tuple, task: asyncio.Task) -> None:
+        """Drop a failed, cancelled or empty fetch so the next call retries it"""
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            return
+        entry = self._hotel_info_cache.get(key)
+        if entry is not None and entry[1] is task:
+            del self._hotel_info_cache[key]
+
+    async def _fetch_realtime_hotel_info(self, destination: str, check_in: str = None, check_out: str = None) -> Optional[str]:
+        """Fetch and format real-time hotel info, returning None on failure"""
         try:
             logger.info(f"Getting real-time hotel info for {destination}")
             
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Test that repeated questions reuse the cached LLM response"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Settings requires these; the fake client below never talks to the network
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-token")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("TAVILY_TOKEN", "test-token")
+
+from app.services.conversation_memory import conversation_memory
+from app.services.llm_service import LLMService
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, answering with a numbered reply"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"answer {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_service() -> LLMService:
+    service = LLMService()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    return service
+
+
+async def ask(service: LLMService, chat_id: int, text: str) -> str:
+    """Store the user turn and answer it, as the text handler does"""
+    conversation_memory.add_user_message(
+        chat_id=chat_id, content=text, message_type="text", user_name="Alice"
+    )
+    context = {"chat_id": chat_id, "chat_type": "private", "user_name": "Alice"}
+    return await service.generate_travel_response_without_followup(text, context, "text")
+
+
+def test_repeated_question_hits_cache():
+    """Asking the same question three times in a row makes one LLM call"""
+    service = make_service()
+    chat_id = 9001
+    conversation_memory.clear_conversation(chat_id)
+
+    async def run():
+        return [await ask(service, chat_id, "Best time to visit Kyoto?") for _ in range(3)]
+
+    answers = asyncio.run(run())
+    calls = service.client.chat.completions.calls
+    print(f"Answers: {answers}, LLM calls: {calls}")
+    assert answers == ["answer 1"] * 3
+    assert calls == 1
+    return True
+
+
+def test_context_dependent_reply_misses_cache():
+    """The same short reply after a different answer is sent to the LLM again"""
+    service = make_service()
+    chat_id = 9002
+    conversation_memory.clear_conversation(chat_id)
+
+    async def run():
+        await ask(service, chat_id, "Plan a trip to Paris")
+        first = await ask(service, chat_id, "yes")
+        await ask(service, chat_id, "Now plan Tokyo")
+        second = await ask(service, chat_id, "yes")
+        return first, second
+
+    first, second = asyncio.run(run())
+    calls = service.client.chat.completions.calls
+    print(f"First 'yes': {first}, second 'yes': {second}, LLM calls: {calls}")
+    assert first != second
+    assert calls == 4
+    return True
+
+
+if __name__ == "__main__":
+    print("Testing response cache reuse")
+    print("=" * 40)
+
+    test1_passed = test_repeated_question_hits_cache()
+    test2_passed = test_context_dependent_reply_misses_cache()
+
+    print(f"Repeated question: {'✅ PASSED' if test1_passed else '❌ FAILED'}")
+    print(f"Context-dependent reply: {'✅ PASSED' if test2_passed else '❌ FAILED'}")